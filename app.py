@@ -3,105 +3,257 @@ Flask Application - Movie Review & Recommendation System
 Main application file with routes and role-based access control
 """
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, session, jsonify, g, make_response, get_flashed_messages
 from models import *
+from cache import cached_reference
 import logging
+import orjson
 from datetime import datetime
 from dotenv import load_dotenv
 import os
-from functools import wraps
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps, partial
+from itertools import chain
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from jinja2 import FileSystemBytecodeCache
+from flask.json.provider import DefaultJSONProvider
+from flask_compress import Compress
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Serialize JSON responses with orjson, keeping Flask's handling of dates and decimals"""
+    
+    def dumps(self, obj, **kwargs):
+        # Callers with stdlib options (e.g. the session serializer) keep the stdlib encoder
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response without a str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# Keep every compiled template in memory and persist the bytecode across restarts
+app.jinja_options = {
+    **app.jinja_options,
+    'cache_size': -1,
+    'bytecode_cache': FileSystemBytecodeCache(os.getenv('JINJA_CACHE_DIR')),
+}
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+# Skip the per-render template mtime check; the dev server below turns it back on
+app.config['TEMPLATES_AUTO_RELOAD'] = False
+# Brotli (gzip as the fallback) for buffered HTML/JSON/JS responses above COMPRESS_MIN_SIZE;
+# streamed pages are sent as they render and are left alone
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_MIMETYPES'] = ['text/html', 'application/json', 'application/javascript']
+app.config['COMPRESS_STREAMS'] = False
+Compress(app)
+app.add_template_global(session_role)
 
-# Initialize database connection
-db.connect()
+# Short-lived caches for the home page and analytics aggregates
+_counts_cache = TTLCache(maxsize=16, ttl=60)
+_home_cache = TTLCache(maxsize=8, ttl=60)
+_cache_lock = threading.Lock()
 
-# Decorator for admin-only routes
-def admin_required(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        logger.info(f"Admin access check for {f.__name__}")
-        logger.info(f"Session user_id: {session.get('user_id')}")
-        
-        if not session.get('user_id'):
-            logger.warning("No user_id in session")
-            flash('Please log in to access this page.', 'error')
-            return redirect(url_for('login'))
-        
-        try:
-            user = User.get_user_by_id(session['user_id'])
-            logger.info(f"User found: {user}")
-            
-            if not user:
-                logger.warning("User not found in database")
-                flash('User not found.', 'error')
-                return redirect(url_for('login'))
-            
-            if user.get('Role') != 'admin':
-                logger.warning(f"User role is {user.get('Role')}, admin required")
-                flash('Access denied. Admin privileges required.', 'error')
-                return redirect(url_for('home'))
-            
-            logger.info("Admin access granted")
-            return f(*args, **kwargs)
-            
-        except Exception as e:
-            logger.error(f"Error in admin_required decorator: {e}")
-            flash(f'Error checking admin access: {str(e)}', 'error')
-            return redirect(url_for('home'))
+# Accepted release years for movies and shows
+MIN_YEAR = 1888
+MAX_YEAR = 2030
+
+# Runs independent page queries side by side, each on its own pooled connection.
+# Capped at half the pool so request threads can always still get a connection
+_query_executor = ThreadPoolExecutor(max_workers=max(1, POOL_SIZE // 2))
+
+def _fan_out(*calls):
+    """Submit (function, *args) calls to the query executor and return their futures in order"""
+    # Hand back this request's connection first so it isn't held idle while the workers wait for theirs
+    db.release_request_connection()
+    return [_query_executor.submit(*call) for call in calls]
+
+def _primed(rows):
+    """Fetch the first row of a streamed result now, so a failing query raises inside the view's try"""
+    rows = iter(rows)
+    try:
+        first = next(rows)
+    except StopIteration:
+        return []
+    return chain((first,), rows)
+
+@cached(_counts_cache, lock=_cache_lock)
+def _table_count(table):
+    """Get the row count of a table"""
+    return db.execute_query(f"SELECT COUNT(*) as count FROM {table}")[0]['count']
+
+def _counted_page(get_page, count, page):
+    """Load one page of a filtered list and its pagination, taking the total from the page's total_rows"""
+    page = max(page or 1, 1)
+    per_page = Pagination.per_page
+    rows = get_page(limit=per_page, offset=(page - 1) * per_page)
+    if rows:
+        return rows, Pagination(page, rows[0]['total_rows'])
+    if page == 1:
+        return rows, Pagination(page, 0)
+    # Past the last page the window count has no row to ride on, so count and clamp
+    pagination = Pagination(page, count())
+    if pagination.page == page:
+        return rows, pagination
+    return get_page(limit=per_page, offset=pagination.offset), pagination
+
+@cached(_home_cache, key=partial(hashkey, 'popular'), lock=_cache_lock)
+def _popular_movies():
+    """Get popular content for the home page"""
+    return Analytics.get_popular_movies()
+
+@cached(_home_cache, key=partial(hashkey, 'top_rated'), lock=_cache_lock)
+def _top_rated_movies():
+    """Get top rated movies for the home page"""
+    return Analytics.get_top_rated_movies()
+
+@cached(_home_cache, key=partial(hashkey, 'top_rated_bundle'), lock=_cache_lock)
+def _top_rated_bundle():
+    """Get top rated movies and shows for the analytics page"""
+    return Analytics.get_top_rated_bundle()
+
+@cached(_home_cache, key=partial(hashkey, 'friendships'), lock=_cache_lock)
+def _friendship_network():
+    """Get the friendship network for the analytics page"""
+    return Analytics.get_friendship_network()
+
+@cached(_home_cache, key=partial(hashkey, 'active_users'), lock=_cache_lock)
+def _active_users():
+    """Get the most active users for the admin dashboard and analytics page"""
+    return Analytics.get_active_users()
+
+@cached_reference('admin_lists_js')
+def _admin_lists_script():
+    """Build the script that hands the reference lists to the admin movie form"""
+    lists = {
+        'genres': [[genre['Genre_ID'], genre['Name']] for genre in Genre.get_all_genres()],
+        'celebrities': [[celebrity['Celebrity_ID'], celebrity['Name'], celebrity['Birth_Year'], celebrity['Nationality']]
+                        for celebrity in Celebrity.get_all_celebrities()],
+        'companies': [[company['Company_ID'], company['Name'], company['Founded_Year'], company['Country']]
+                      for company in ProductionCompany.get_all_companies()],
+    }
+    return b'window.ADMIN_LISTS = ' + orjson.dumps(lists, default=app.json.default) + b';\n'
+
+# Decorator for slowly changing pages that browsers may reuse for a while
+def http_cached(max_age):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            # Pages carrying flash messages (e.g. load errors) are one-off
+            if get_flashed_messages():
+                return response
+            # The navbar depends on the session, so only the browser may cache it, and a
+            # login or logout (a new session cookie) must not be served the old copy
+            response.cache_control.private = True
+            response.cache_control.max_age = max_age
+            response.vary.add('Cookie')
+            response.add_etag()
+            return response.make_conditional(request)
+        return decorated_function
+    return decorator
+
+class Pagination:
+    """One page of a LIMIT/OFFSET-paginated list"""
+    
+    per_page = 50
+    
+    def __init__(self, page, total, per_page=None):
+        self.per_page = per_page or Pagination.per_page
+        self.total = total or 0
+        self.page = min(max(page or 1, 1), self.pages)
+    
+    @property
+    def pages(self):
+        return max(1, -(-self.total // self.per_page))
+    
+    @property
+    def offset(self):
+        return (self.page - 1) * self.per_page
     
-    return decorated_function
+    @property
+    def has_prev(self):
+        return self.page > 1
+    
+    @property
+    def has_next(self):
+        return self.page < self.pages
+    
+    @property
+    def prev_num(self):
+        return self.page - 1
+    
+    @property
+    def next_num(self):
+        return self.page + 1
+
+def validate_title_year(title, year):
+    """Check the title and release year shared by the movie and show forms, flashing any problem"""
+    if not (title and year):
+        flash('Title and year are required.', 'error')
+        return False
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        flash(f'Year must be between {MIN_YEAR} and {MAX_YEAR}.', 'error')
+        return False
+    return True
+
+def parse_credits(raw, default_role=None):
+    """Decode and validate the JSON credit list posted by the movie forms"""
+    if not raw:
+        return []
+    credits = []
+    for entry in orjson.loads(raw):
+        role = str(entry.get('role') or default_role or '').strip()
+        if not role or len(role) > 100:
+            raise ValueError('Each credit needs a role of at most 100 characters.')
+        credits.append({'id': int(entry['id']), 'role': role})
+    return credits
 
 @app.route('/')
 def home():
     """Home page with recent reviews and popular content"""
     try:
         # Get data with fallbacks
-        recent_reviews = []
-        popular_movies = []
-        top_rated_movies = []
-        
-        try:
-            recent_reviews = Review.get_recent_reviews(5)
-        except Exception as e:
-            logger.warning(f"Could not load recent reviews: {e}")
-            recent_reviews = []
-        
-        try:
-            popular_movies = Analytics.get_popular_movies()[:5]
-        except Exception as e:
-            logger.warning(f"Could not load popular movies: {e}")
-            popular_movies = []
-        
-        try:
-            top_rated_movies = Analytics.get_top_rated_movies()[:5]
-        except Exception as e:
-            logger.warning(f"Could not load top rated movies: {e}")
-            top_rated_movies = []
+        loaders = {
+            'recent_reviews': (lambda: Review.get_recent_reviews(5), []),
+            'popular_movies': (lambda: _popular_movies()[:5], []),
+            'top_rated_movies': (lambda: _top_rated_movies()[:5], []),
+            'total_movies': (lambda: _table_count('Movie'), 0),
+            'total_reviews': (lambda: _table_count('Reviews'), 0),
+        }
+        futures = dict(zip(loaders, _fan_out(*((loader,) for loader, _ in loaders.values()))))
         
-        # Get total counts for quick stats
-        total_movies = 0
-        total_reviews = 0
-        try:
-            total_movies = db.execute_query("SELECT COUNT(*) as count FROM Movie")[0]['count']
-            total_reviews = db.execute_query("SELECT COUNT(*) as count FROM Reviews")[0]['count']
-        except Exception as e:
-            logger.warning(f"Could not load total counts: {e}")
+        data = {}
+        for name, future in futures.items():
+            try:
+                data[name] = future.result()
+            except Exception as e:
+                logger.warning(f"Could not load {name.replace('_', ' ')}: {e}")
+                data[name] = loaders[name][1]
         
-        return render_template('home.html', 
-                             recent_reviews=recent_reviews,
-                             popular_movies=popular_movies,
-                             top_rated_movies=top_rated_movies,
-                             total_movies=total_movies,
-                             total_reviews=total_reviews)
+        return render_template('home.html', **data)
     except Exception as e:
         logger.error(f"Error loading home page: {e}")
         # Return with empty data instead of showing error
@@ -119,14 +271,14 @@ def login():
         
         if not email or not password:
             flash('Please fill in all fields.', 'error')
-            return render_template('login.html')
+            return redirect(url_for('login'))
         
         try:
             user = User.get_user_by_email(email)
             if user and User.verify_password(user, password):
                 session['user_id'] = user['User_ID']
                 session['user_name'] = user['Name']
-                session['user_role'] = user['Role']
+                store_session_access(user)
                 flash(f'Welcome back, {user["Name"]}!', 'success')
                 return redirect(url_for('home'))
             else:
@@ -134,6 +286,8 @@ def login():
         except Exception as e:
             logger.error(f"Login error: {e}")
             flash('Login failed. Please try again.', 'error')
+        # Failed submissions redirect back; the form restores its own values from a draft
+        return redirect(url_for('login'))
     
     return render_template('login.html')
 
@@ -160,22 +314,22 @@ def register():
         # Validation
         if not all([name, email, password, confirm_password]):
             flash('Please fill in all required fields.', 'error')
-            return render_template('register.html')
+            return redirect(url_for('register'))
         
         if password != confirm_password:
             flash('Passwords do not match.', 'error')
-            return render_template('register.html')
+            return redirect(url_for('register'))
         
         if age and (age < 13 or age > 120):
             flash('Age must be between 13 and 120.', 'error')
-            return render_template('register.html')
+            return redirect(url_for('register'))
         
         try:
             # Check if email already exists
             existing_user = User.get_user_by_email(email)
             if existing_user:
                 flash('Email already registered.', 'error')
-                return render_template('register.html')
+                return redirect(url_for('register'))
             
             # Create user
             user_id = User.create_user(
@@ -198,8 +352,13 @@ def register():
         except Exception as e:
             logger.error(f"Registration error: {e}")
             flash(f'Registration failed: {str(e)}', 'error')
+        return redirect(url_for('register'))
     
-    # Get data for dropdowns
+    return render_register_form()
+
+def render_register_form():
+    """Render the registration form with its dropdown data"""
+    # Both lists are served from the reference cache
     companies = ProductionCompany.get_all_companies()
     celebrities = Celebrity.get_all_celebrities()
     
@@ -219,25 +378,44 @@ def movies():
         # Optional filters
         genre_id = request.args.get('genre', type=int)
         q = request.args.get('q', type=str)
+        page = request.args.get('page', 1, type=int)
 
-        movies = Movie.get_movies_filtered(genre_id=genre_id, search_query=q) if (genre_id or q) else Movie.get_all_movies()
+        # Everything on the shared connection loads first: the streamed rows below hold a
+        # pooled connection of their own until the page is sent. That includes the
+        # navbar's role lookup, which sessions created before the role was stored need.
         genres = Genre.get_all_genres()
-        return render_template('movies.html', movies=movies, genres=genres, selected_genre=genre_id, q=q or '')
+        session_role()
+        
+        # Filtered pages get their total from the same query; the unfiltered one from the table count
+        if genre_id or q:
+            movies, pagination = _counted_page(
+                partial(Movie.get_movies_page, genre_id=genre_id, search_query=q),
+                partial(Movie.count_movies_filtered, genre_id=genre_id, search_query=q), page)
+        else:
+            pagination = Pagination(page, _table_count('Movie'))
+            movies = _primed(Movie.get_movies_filtered(limit=pagination.per_page, offset=pagination.offset, stream=True))
+        return stream_template('movies.html', movies=movies, genres=genres, selected_genre=genre_id, q=q or '',
+                             pagination=pagination)
     except Exception as e:
         logger.error(f"Error loading movies: {e}")
         flash('Error loading movies. Please try again.', 'error')
-        return render_template('movies.html', movies=[], genres=[], selected_genre=None, q='')
+        return render_template('movies.html', movies=[], genres=[], selected_genre=None, q='', pagination=None)
 
 @app.route('/movie/<int:movie_id>/edit', methods=['GET', 'POST'])
-@admin_required
+@verified_user_required
 def edit_movie(movie_id):
-    """Edit movie (admin only)"""
+    """Edit movie (admins, or verified users credited on it)"""
     try:
-        movie = Movie.get_movie_by_id(movie_id)
+        # The movie and its current relations are loaded once and reused by the form below
+        movie, movie_genres, movie_celebrities, movie_productions = Movie.get_edit_bundle(movie_id)
         if not movie:
             flash('Movie not found.', 'error')
             return redirect(url_for('movies'))
         
+        if not can_edit_movie(movie_celebrities, movie_productions):
+            flash('You do not have permission to edit this movie.', 'error')
+            return redirect(url_for('movie_detail', movie_id=movie_id))
+        
         if request.method == 'POST':
             try:
                 title = request.form.get('title')
@@ -248,16 +426,11 @@ def edit_movie(movie_id):
                 genre_ids = request.form.getlist('genres')
                 
                 # Get celebrity and production company data
-                celebrity_data = request.form.get('celebrity_data')
-                production_data = request.form.get('production_data')
+                celebrity_data = parse_credits(request.form.get('celebrity_data'))
+                production_data = parse_credits(request.form.get('production_data'), default_role='Producer')
                 
                 # Validation
-                if not all([title, year]):
-                    flash('Title and year are required.', 'error')
-                    return redirect(url_for('edit_movie', movie_id=movie_id))
-                
-                if year < 1888 or year > 2030:
-                    flash('Year must be between 1888 and 2030.', 'error')
+                if not validate_title_year(title, year):
                     return redirect(url_for('edit_movie', movie_id=movie_id))
                 
                 # Update movie with all details
@@ -282,14 +455,12 @@ def edit_movie(movie_id):
             except Exception as e:
                 logger.error(f"Error updating movie: {e}")
                 flash(f'Error updating movie: {str(e)}', 'error')
+            return redirect(url_for('edit_movie', movie_id=movie_id))
         
         # Get all data for the form
         genres = Genre.get_all_genres()
         celebrities = Celebrity.get_all_celebrities()
         production_companies = ProductionCompany.get_all_companies()
-        movie_genres = Movie.get_movie_genres(movie_id)
-        movie_celebrities = Movie.get_movie_celebrities(movie_id)
-        movie_productions = Movie.get_movie_production_companies(movie_id)
         
         return render_template('edit_movie.html', 
                              movie=movie,
@@ -309,17 +480,13 @@ def edit_movie(movie_id):
 def movie_detail(movie_id):
     """Movie detail page"""
     try:
-        movie = Movie.get_movie_by_id(movie_id)
+        movie, genres, celebrities, productions, reviews = Movie.get_detail_bundle(movie_id)
         if not movie:
             flash('Movie not found.', 'error')
             return redirect(url_for('movies'))
         
-        genres = Movie.get_movie_genres(movie_id)
-        celebrities = Movie.get_movie_celebrities(movie_id)
-        reviews = Movie.get_movie_reviews(movie_id)
-        
-        # Check if user can edit this movie (admin can edit all)
-        can_edit = session.get('user_role') == 'admin'
+        # Admins can edit every movie, verified users the ones crediting them
+        can_edit = can_edit_movie(celebrities, productions)
         
         return render_template('movie_detail.html', 
                              movie=movie,
@@ -338,28 +505,38 @@ def shows():
     try:
         genre_id = request.args.get('genre', type=int)
         q = request.args.get('q', type=str)
-        shows = TVShow.get_shows_filtered(genre_id=genre_id, search_query=q) if (genre_id or q) else TVShow.get_all_shows()
+        page = request.args.get('page', 1, type=int)
+
+        # Shared-connection lookups first, as in movies(): the streamed rows hold their own connection
         genres = Genre.get_all_genres()
-        return render_template('shows.html', shows=shows, genres=genres, selected_genre=genre_id, q=q or '')
+        session_role()
+        
+        # Filtered pages get their total from the same query; the unfiltered one from the table count
+        if genre_id or q:
+            shows, pagination = _counted_page(
+                partial(TVShow.get_shows_page, genre_id=genre_id, search_query=q),
+                partial(TVShow.count_shows_filtered, genre_id=genre_id, search_query=q), page)
+        else:
+            pagination = Pagination(page, _table_count('TV_Show'))
+            shows = _primed(TVShow.get_shows_filtered(limit=pagination.per_page, offset=pagination.offset, stream=True))
+        return stream_template('shows.html', shows=shows, genres=genres, selected_genre=genre_id, q=q or '',
+                             pagination=pagination)
     except Exception as e:
         logger.error(f"Error loading shows: {e}")
         flash('Error loading shows. Please try again.', 'error')
-        return render_template('shows.html', shows=[], genres=[], selected_genre=None, q='')
+        return render_template('shows.html', shows=[], genres=[], selected_genre=None, q='', pagination=None)
 
 @app.route('/show/<int:show_id>')
 def show_detail(show_id):
     """Show detail page"""
     try:
-        show = TVShow.get_show_by_id(show_id)
+        show, genres, reviews = TVShow.get_detail_bundle(show_id)
         if not show:
             flash('Show not found.', 'error')
             return redirect(url_for('shows'))
         
-        genres = TVShow.get_show_genres(show_id)
-        reviews = TVShow.get_show_reviews(show_id)
-        
         # Check if user can edit this show (admin can edit all)
-        can_edit = session.get('user_role') == 'admin'
+        can_edit = session_role() == 'admin'
         
         return render_template('show_detail.html', 
                              show=show,
@@ -442,12 +619,21 @@ def add_review():
     # GET request - show form
     movie_id = request.args.get('movie_id', type=int)
     show_id = request.args.get('show_id', type=int)
+    # Detail pages pass the title and year along so the form needs no lookup
+    title = request.args.get('title', type=str)
+    year = request.args.get('year', type=int)
     
     if movie_id:
-        movie = Movie.get_movie_by_id(movie_id)
+        if title:
+            movie = {'Movie_ID': movie_id, 'Title': title, 'Year': year}
+        else:
+            movie = Movie.get_movie_by_id(movie_id)
         return render_template('add_review.html', movie=movie, show=None)
     elif show_id:
-        show = TVShow.get_show_by_id(show_id)
+        if title:
+            show = {'Show_ID': show_id, 'Title': title, 'Year': year}
+        else:
+            show = TVShow.get_show_by_id(show_id)
         return render_template('add_review.html', movie=None, show=show)
     else:
         flash('Please select a movie or show to review.', 'error')
@@ -537,14 +723,15 @@ def recommendations():
     try:
         user_id = session['user_id']
         
-        # Get movie recommendations
-        movie_recommendations = Recommendation.get_movie_recommendations(user_id, 10)
-        
-        # Get friend recommendations
-        friend_recommendations = Recommendation.get_friend_recommendations(user_id, 10)
+        # The three lookups are independent, so each waits on MySQL on its own pool connection
+        movies_future, friends_future, preferences_future = _fan_out(
+            (Recommendation.get_movie_recommendations, user_id, 10),
+            (Recommendation.get_friend_recommendations, user_id, 10),
+            (Genre.get_user_preferences, user_id))
         
-        # Get user preferences
-        user_preferences = Genre.get_user_preferences(user_id)
+        movie_recommendations = movies_future.result()
+        friend_recommendations = friends_future.result()
+        user_preferences = preferences_future.result()
         
         return render_template('recommendations.html',
                              movie_recommendations=movie_recommendations,
@@ -564,14 +751,11 @@ def friends():
         q = request.args.get('q', type=str)
         friends = Friendship.get_user_friends_filtered(user_id, search_query=q)
         
-        # Get all users for adding friends
-        all_users = db.execute_query("SELECT User_ID, Name, Email FROM User WHERE User_ID != %s ORDER BY Name", (user_id,))
-        
-        return render_template('friends.html', friends=friends, all_users=all_users, q=q or '')
+        return render_template('friends.html', friends=friends, q=q or '')
     except Exception as e:
         logger.error(f"Error loading friends: {e}")
         flash('Error loading friends. Please try again.', 'error')
-        return render_template('friends.html', friends=[], all_users=[], q='')
+        return render_template('friends.html', friends=[], q='')
 
 @app.route('/add_friend', methods=['POST'])
 @login_required
@@ -617,9 +801,9 @@ def profile():
     """User profile page"""
     try:
         user_id = session['user_id']
-        user = User.get_user_by_id(user_id)
+        user = current_user()
         user_stats = User.get_user_stats(user_id)
-        user_reviews = Review.get_user_reviews(user_id)
+        user_reviews = _primed(Review.get_user_reviews(user_id, stream=True))
         
         # Ensure user_stats has default values
         if not user_stats:
@@ -630,10 +814,10 @@ def profile():
             user_stats.setdefault('friend_count', 0)
             user_stats.setdefault('avg_score', 'N/A')
         
-        return render_template('profile.html', 
-                             user=user,
-                             user_stats=user_stats,
-                             user_reviews=user_reviews)
+        return stream_template('profile.html',
+                               user=user,
+                               user_stats=user_stats,
+                               user_reviews=user_reviews)
     except Exception as e:
         logger.error(f"Error loading profile: {e}")
         flash('Error loading profile. Please try again.', 'error')
@@ -645,18 +829,22 @@ def profile():
 def admin_dashboard():
     """Admin dashboard"""
     try:
-        # Get statistics
-        stats = {
-            'total_users': db.execute_query("SELECT COUNT(*) as count FROM User")[0]['count'],
-            'total_movies': db.execute_query("SELECT COUNT(*) as count FROM Movie")[0]['count'],
-            'total_shows': db.execute_query("SELECT COUNT(*) as count FROM TV_Show")[0]['count'],
-            'total_reviews': db.execute_query("SELECT COUNT(*) as count FROM Reviews")[0]['count'],
-            'total_friendships': db.execute_query("SELECT COUNT(*) as count FROM Friends")[0]['count']
-        }
+        # Get statistics and recent activity
+        stats_future, reviews_future, users_future = _fan_out(
+            (db.execute_query, """
+            SELECT 
+                (SELECT COUNT(*) FROM User) as total_users,
+                (SELECT COUNT(*) FROM Movie) as total_movies,
+                (SELECT COUNT(*) FROM TV_Show) as total_shows,
+                (SELECT COUNT(*) FROM Reviews) as total_reviews,
+                (SELECT COUNT(*) FROM Friends) as total_friendships
+            """),
+            (Review.get_recent_reviews, 10),
+            (_active_users,))
         
-        # Get recent activity
-        recent_reviews = Review.get_recent_reviews(10)
-        active_users = Analytics.get_active_users()[:10]
+        stats = dict(stats_future.result()[0])
+        recent_reviews = reviews_future.result()
+        active_users = users_future.result()[:10]
         
         return render_template('admin_dashboard.html', 
                              stats=stats,
@@ -683,26 +871,27 @@ def admin_dashboard():
 def admin_users():
     """Admin users management"""
     try:
-        users = db.execute_query("SELECT * FROM User ORDER BY Created_At DESC")
-        return render_template('admin_users.html', users=users)
+        pagination = Pagination(request.args.get('page', 1, type=int), _table_count('User'))
+        users = _primed(db.stream_query("SELECT * FROM User ORDER BY Created_At DESC LIMIT %s OFFSET %s",
+                                        (pagination.per_page, pagination.offset), named_tuples=True))
+        return stream_template('admin_users.html', users=users, pagination=pagination)
     except Exception as e:
         logger.error(f"Error loading admin users: {e}")
         flash('Error loading users.', 'error')
-        return render_template('admin_users.html', users=[])
+        return render_template('admin_users.html', users=[], pagination=None)
 
 @app.route('/admin/movies')
 @admin_required
 def admin_movies():
     """Admin movies management"""
     try:
-        logger.info("Loading admin movies...")
-        movies = Movie.get_all_movies()
-        logger.info(f"Found {len(movies)} movies")
-        return render_template('admin_movies.html', movies=movies)
+        pagination = Pagination(request.args.get('page', 1, type=int), _table_count('Movie'))
+        movies = _primed(Movie.get_all_movies(limit=pagination.per_page, offset=pagination.offset, stream=True))
+        return stream_template('admin_movies.html', movies=movies, pagination=pagination)
     except Exception as e:
         logger.error(f"Error loading admin movies: {e}")
         flash(f'Error displaying movies: {str(e)}', 'error')
-        return render_template('admin_movies.html', movies=[])
+        return render_template('admin_movies.html', movies=[], pagination=None)
 
 @app.route('/admin/movies/add', methods=['GET', 'POST'])
 @admin_required
@@ -718,61 +907,50 @@ def admin_add_movie():
             genre_ids = request.form.getlist('genres')
             
             # Get celebrity and production company data
-            celebrity_data = request.form.get('celebrity_data')
-            production_data = request.form.get('production_data')
-            
-            # Validation
-            if not all([title, year]):
-                flash('Title and year are required.', 'error')
-                return render_template('admin_add_movie.html', 
-                                     genres=Genre.get_all_genres(),
-                                     celebrities=Celebrity.get_all_celebrities(),
-                                     production_companies=ProductionCompany.get_all_companies())
-            
-            if year < 1888 or year > 2030:
-                flash('Year must be between 1888 and 2030.', 'error')
-                return render_template('admin_add_movie.html',
-                                     genres=Genre.get_all_genres(),
-                                     celebrities=Celebrity.get_all_celebrities(),
-                                     production_companies=ProductionCompany.get_all_companies())
+            celebrity_data = parse_credits(request.form.get('celebrity_data'))
+            production_data = parse_credits(request.form.get('production_data'), default_role='Producer')
             
-            # Create movie with all details
-            movie_id = Movie.create_movie_with_details(
-                title=title,
-                description=description,
-                year=year,
-                length=length,
-                age_rating=age_rating,
-                genre_ids=genre_ids,
-                celebrity_data=celebrity_data,
-                production_data=production_data
-            )
-            
-            if movie_id:
-                flash('Movie added successfully!', 'success')
-                return redirect(url_for('admin_movies'))
-            else:
-                flash('Failed to add movie.', 'error')
+            # Failed submissions redirect back; the form restores its own values from a draft
+            if validate_title_year(title, year):
+                # Create movie with all details
+                movie_id = Movie.create_movie_with_details(
+                    title=title,
+                    description=description,
+                    year=year,
+                    length=length,
+                    age_rating=age_rating,
+                    genre_ids=genre_ids,
+                    celebrity_data=celebrity_data,
+                    production_data=production_data
+                )
+                
+                if movie_id:
+                    flash('Movie added successfully!', 'success')
+                    return redirect(url_for('admin_movies'))
+                else:
+                    flash('Failed to add movie.', 'error')
                 
         except Exception as e:
             logger.error(f"Error adding movie: {e}")
             flash(f'Error adding movie: {str(e)}', 'error')
+        return redirect(url_for('admin_add_movie'))
     
-    # Get all data for the form
-    genres = Genre.get_all_genres()
-    celebrities = Celebrity.get_all_celebrities()
-    production_companies = ProductionCompany.get_all_companies()
-    
-    return render_template('admin_add_movie.html', 
-                         genres=genres,
-                         celebrities=celebrities,
-                         production_companies=production_companies)
+    # The genre, celebrity and company lists are filled in from admin_lists_js
+    return render_template('admin_add_movie.html')
+
+@app.route('/admin/lists.js')
+@admin_required
+@http_cached(0)
+def admin_lists_js():
+    """Reference lists for the admin movie form as one browser-cacheable script"""
+    # Rebuilt after the reference cache is cleared by the admin add routes; the ETag lets browsers revalidate cheaply
+    return app.response_class(_admin_lists_script(), mimetype='application/javascript')
 
 @app.route('/admin/movies/edit/<int:movie_id>', methods=['GET', 'POST'])
 @admin_required
 def admin_edit_movie(movie_id):
     """Edit movie"""
-    movie = Movie.get_movie_by_id(movie_id)
+    movie, movie_genres, movie_celebrities, movie_productions = Movie.get_edit_bundle(movie_id)
     if not movie:
         flash('Movie not found.', 'error')
         return redirect(url_for('admin_movies'))
@@ -787,62 +965,38 @@ def admin_edit_movie(movie_id):
             genre_ids = request.form.getlist('genres')
             
             # Get celebrity and production company data
-            celebrity_data = request.form.get('celebrity_data')
-            production_data = request.form.get('production_data')
+            celebrity_data = parse_credits(request.form.get('celebrity_data'))
+            production_data = parse_credits(request.form.get('production_data'), default_role='Producer')
             
-            # Validation
-            if not all([title, year]):
-                flash('Title and year are required.', 'error')
-                return render_template('admin_edit_movie.html', 
-                                     movie=movie,
-                                     genres=Genre.get_all_genres(),
-                                     celebrities=Celebrity.get_all_celebrities(),
-                                     production_companies=ProductionCompany.get_all_companies(),
-                                     movie_genres=Movie.get_movie_genres(movie_id),
-                                     movie_celebrities=Movie.get_movie_celebrities(movie_id),
-                                     movie_productions=Movie.get_movie_production_companies(movie_id))
-            
-            if year < 1888 or year > 2030:
-                flash('Year must be between 1888 and 2030.', 'error')
-                return render_template('admin_edit_movie.html',
-                                     movie=movie,
-                                     genres=Genre.get_all_genres(),
-                                     celebrities=Celebrity.get_all_celebrities(),
-                                     production_companies=ProductionCompany.get_all_companies(),
-                                     movie_genres=Movie.get_movie_genres(movie_id),
-                                     movie_celebrities=Movie.get_movie_celebrities(movie_id),
-                                     movie_productions=Movie.get_movie_production_companies(movie_id))
-            
-            # Update movie with all details
-            success = Movie.update_movie_with_details(
-                movie_id=movie_id,
-                title=title,
-                description=description,
-                year=year,
-                length=length,
-                age_rating=age_rating,
-                genre_ids=genre_ids,
-                celebrity_data=celebrity_data,
-                production_data=production_data
-            )
-            
-            if success:
-                flash('Movie updated successfully!', 'success')
-                return redirect(url_for('admin_movies'))
-            else:
-                flash('Failed to update movie.', 'error')
+            # Failed submissions redirect back; the form restores its own values from a draft
+            if validate_title_year(title, year):
+                # Update movie with all details
+                success = Movie.update_movie_with_details(
+                    movie_id=movie_id,
+                    title=title,
+                    description=description,
+                    year=year,
+                    length=length,
+                    age_rating=age_rating,
+                    genre_ids=genre_ids,
+                    celebrity_data=celebrity_data,
+                    production_data=production_data
+                )
+                
+                if success:
+                    flash('Movie updated successfully!', 'success')
+                    return redirect(url_for('admin_movies'))
+                else:
+                    flash('Failed to update movie.', 'error')
                 
         except Exception as e:
             logger.error(f"Error updating movie: {e}")
             flash(f'Error updating movie: {str(e)}', 'error')
+        return redirect(url_for('admin_edit_movie', movie_id=movie_id))
     
-    # Get all data for the form
-    genres = Genre.get_all_genres()
-    celebrities = Celebrity.get_all_celebrities()
-    production_companies = ProductionCompany.get_all_companies()
-    movie_genres = Movie.get_movie_genres(movie_id)
-    movie_celebrities = Movie.get_movie_celebrities(movie_id)
-    movie_productions = Movie.get_movie_production_companies(movie_id)
+    # Get all data for the form, each list on its own connection, once the movie is known to exist
+    genres, celebrities, production_companies = (future.result() for future in _fan_out(
+        (Genre.get_all_genres,), (Celebrity.get_all_celebrities,), (ProductionCompany.get_all_companies,)))
     
     return render_template('admin_edit_movie.html', 
                          movie=movie,
@@ -882,14 +1036,9 @@ def admin_add_show():
             episodes = request.form.get('episodes', type=int)
             age_rating = request.form.get('age_rating')
             
-            # Validation
-            if not all([title, year]):
-                flash('Title and year are required.', 'error')
-                return render_template('admin_add_show.html')
-            
-            if year < 1888 or year > 2030:
-                flash('Year must be between 1888 and 2030.', 'error')
-                return render_template('admin_add_show.html')
+            # Validation (the form restores its own values from a draft after the redirect)
+            if not validate_title_year(title, year):
+                return redirect(url_for('admin_add_show'))
             
             # Create show
             show_id = TVShow.create_show(
@@ -910,6 +1059,7 @@ def admin_add_show():
         except Exception as e:
             logger.error(f"Error adding TV show: {e}")
             flash(f'Error adding TV show: {str(e)}', 'error')
+        return redirect(url_for('admin_add_show'))
     
     return render_template('admin_add_show.html')
 
@@ -918,19 +1068,21 @@ def admin_add_show():
 def admin_shows():
     """Admin shows management"""
     try:
-        shows = TVShow.get_all_shows()
-        return render_template('admin_shows.html', shows=shows)
+        pagination = Pagination(request.args.get('page', 1, type=int), _table_count('TV_Show'))
+        shows = _primed(TVShow.get_all_shows(limit=pagination.per_page, offset=pagination.offset, stream=True))
+        return stream_template('admin_shows.html', shows=shows, pagination=pagination)
     except Exception as e:
         logger.error(f"Error loading admin shows: {e}")
         flash('Error loading shows.', 'error')
-        return render_template('admin_shows.html', shows=[])
+        return render_template('admin_shows.html', shows=[], pagination=None)
 
 # Analytics and views routes
 @app.route('/analytics/popular')
+@http_cached(60)
 def analytics_popular():
     """Popular movies analytics"""
     try:
-        popular_movies = Analytics.get_popular_movies()
+        popular_movies = _popular_movies()
         return render_template('analytics_popular.html', movies=popular_movies)
     except Exception as e:
         logger.error(f"Error loading popular movies: {e}")
@@ -938,11 +1090,11 @@ def analytics_popular():
         return render_template('analytics_popular.html', movies=[])
 
 @app.route('/analytics/top-rated')
+@http_cached(60)
 def analytics_top_rated():
     """Top rated content analytics"""
     try:
-        top_movies = Analytics.get_top_rated_movies()
-        top_shows = Analytics.get_top_rated_shows()
+        top_movies, top_shows = _top_rated_bundle()
         return render_template('analytics_top_rated.html', 
                              top_movies=top_movies,
                              top_shows=top_shows)
@@ -955,7 +1107,7 @@ def analytics_top_rated():
 def analytics_users():
     """User analytics"""
     try:
-        active_users = Analytics.get_active_users()
+        active_users = _active_users()
         return render_template('analytics_users.html', users=active_users)
     except Exception as e:
         logger.error(f"Error loading user analytics: {e}")
@@ -963,10 +1115,11 @@ def analytics_users():
         return render_template('analytics_users.html', users=[])
 
 @app.route('/analytics/friendships')
+@http_cached(60)
 def analytics_friendships():
     """Friendship network analytics"""
     try:
-        friendship_network = Analytics.get_friendship_network()
+        friendship_network = _friendship_network()
         return render_template('analytics_friendships.html', friendships=friendship_network)
     except Exception as e:
         logger.error(f"Error loading friendship analytics: {e}")
@@ -994,6 +1147,20 @@ def api_show_rating(show_id):
         logger.error(f"Error getting show rating stats: {e}")
         return jsonify({'error': 'Failed to get rating stats'}), 500
 
+@app.route('/api/users/search')
+@login_required
+def api_user_search():
+    """API endpoint for the add-friend user search"""
+    q = request.args.get('q', '', type=str).strip()
+    if len(q) < 2:
+        return jsonify([])
+    try:
+        users = User.search_users(q, exclude_user_id=session['user_id'])
+        return jsonify(users)
+    except Exception as e:
+        logger.error(f"Error searching users: {e}")
+        return jsonify({'error': 'Failed to search users'}), 500
+
 @app.route('/api/user/<int:user_id>/preferences')
 @login_required
 def api_user_preferences(user_id):
@@ -1100,27 +1267,33 @@ def not_found(error):
 
 @app.errorhandler(500)
 def internal_error(error):
-    db.connection.rollback()
+    db.release_request_connection(rollback=True)
     return render_template('500.html'), 500
 
+@app.teardown_appcontext
+def release_db_connection(error):
+    db.release_request_connection(rollback=error is not None)
+
 # Template filters
 @app.template_filter('datetime')
 def datetime_filter(timestamp):
     """Format timestamp for display"""
+    # Slicing the ISO form is much cheaper than strftime for these fixed formats
     if timestamp:
-        return timestamp.strftime('%Y-%m-%d %H:%M')
+        return str(timestamp)[:16]
     return ''
 
 @app.template_filter('date')
 def date_filter(timestamp):
     """Format timestamp as date only"""
     if timestamp:
-        return timestamp.strftime('%Y-%m-%d')
+        return str(timestamp)[:10]
     return ''
 
 if __name__ == '__main__':
     # Ensure database connection
     if db.connect():
+        app.jinja_env.auto_reload = True
         app.run(debug=True, host='0.0.0.0', port=5000)
     else:
         logger.error("Failed to connect to database. Exiting.")
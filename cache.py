@@ -0,0 +1,85 @@
+"""
+In-process Caches
+Movie Review & Recommendation System
+"""
+
+import threading
+from functools import partial
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+
+# Genres, celebrities and production companies change rarely, so their
+# full-table lookups are kept for a few minutes
+reference_cache = TTLCache(maxsize=8, ttl=300)
+_reference_lock = threading.Lock()
+
+# A movie's genre, cast and production lists only change when it is edited
+movie_relations_cache = TTLCache(maxsize=1024, ttl=300)
+_movie_relations_lock = threading.Lock()
+
+# Single movie and show rows, with their review aggregates, for a minute
+content_cache = TTLCache(maxsize=2048, ttl=60)
+_content_lock = threading.Lock()
+
+# Friend-based recommendations per user; friends' new reviews show up within a minute
+friend_recommendations_cache = TTLCache(maxsize=1024, ttl=60)
+_friend_recommendations_lock = threading.Lock()
+
+# The latest reviews look the same to everyone for a few seconds at a time
+recent_reviews_cache = TTLCache(maxsize=4, ttl=30)
+_recent_reviews_lock = threading.Lock()
+
+def cached_reference(name):
+    """Cache a reference-table getter under the given name"""
+    return cached(reference_cache, key=partial(hashkey, name), lock=_reference_lock)
+
+def clear_reference_cache():
+    """Drop all cached reference-table rows"""
+    with _reference_lock:
+        reference_cache.clear()
+
+def cached_movie_relation(name):
+    """Cache a per-movie relation getter under the given name"""
+    return cached(movie_relations_cache, key=partial(hashkey, name), lock=_movie_relations_lock)
+
+def clear_movie_relations(movie_id):
+    """Drop the cached relation lists of one movie"""
+    with _movie_relations_lock:
+        for name in ('genres', 'celebrities', 'productions'):
+            movie_relations_cache.pop(hashkey(name, movie_id), None)
+
+def cached_content(name):
+    """Cache a movie or show lookup by ID under the given name"""
+    return cached(content_cache, key=partial(hashkey, name), lock=_content_lock)
+
+def clear_content(name, content_id):
+    """Drop one cached movie or show row"""
+    with _content_lock:
+        content_cache.pop(hashkey(name, content_id), None)
+
+def clear_content_cache():
+    """Drop every cached movie and show row"""
+    with _content_lock:
+        content_cache.clear()
+
+def cached_friend_recommendations(func):
+    """Cache the friend recommendations per user and limit"""
+    return cached(friend_recommendations_cache, lock=_friend_recommendations_lock)(func)
+
+def clear_friend_recommendations(*user_ids):
+    """Drop the cached friend recommendations of the given users, or of everyone when none are given"""
+    with _friend_recommendations_lock:
+        if not user_ids:
+            friend_recommendations_cache.clear()
+            return
+        for key in [key for key in friend_recommendations_cache if key[0] in user_ids]:
+            friend_recommendations_cache.pop(key, None)
+
+def cached_recent_reviews(func):
+    """Cache the recent-reviews getter per limit"""
+    return cached(recent_reviews_cache, lock=_recent_reviews_lock)(func)
+
+def clear_recent_reviews_cache():
+    """Drop the cached recent reviews after a review changes"""
+    with _recent_reviews_lock:
+        recent_reviews_cache.clear()
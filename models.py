@@ -4,115 +4,331 @@ Movie Review & Recommendation System
 """
 
 import mysql.connector
-from mysql.connector import Error
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from mysql.connector import Error, pooling
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, g, has_app_context, has_request_context
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.exceptions import ServiceUnavailable
 import os
-from functools import wraps
+import re
+import orjson
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps, lru_cache
 import logging
 from dotenv import load_dotenv
+from cache import (cached_reference, clear_reference_cache, cached_movie_relation, clear_movie_relations,
+                   cached_content, clear_content, clear_content_cache,
+                   cached_recent_reviews, clear_recent_reviews_cache,
+                   cached_friend_recommendations, clear_friend_recommendations)
 
 # Load environment variables from .env file
 load_dotenv()
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
+# Settings can also come from the process environment, so a missing .env is only worth a warning
+if 'DB_PASSWORD' not in os.environ:
+    logger.warning("DB_PASSWORD is not set; add your database configuration to a .env file")
+
+# Werkzeug hash method for new passwords, e.g. 'pbkdf2:sha256:260000' or 'scrypt';
+# existing hashes keep verifying with the parameters stored in them
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2')
+
+# Connections per worker process; mysql-connector caps a pool at 32
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 16))
+# Seconds to wait for a free pooled connection before answering 503
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Seconds a session keeps reading from the primary after it writes, to cover replica lag
+READ_AFTER_WRITE_WINDOW = float(os.getenv('DB_READ_AFTER_WRITE', 10))
+
+@lru_cache(maxsize=64)
+def _row_class(columns):
+    """Build (once per column list) the named tuple type used for streamed rows"""
+    return namedtuple('Row', columns, rename=True)
+
 class DatabaseConnection:
     """Database connection manager"""
     
-    def __init__(self):
-        self.connection = None
+    def __init__(self, host=None, pool_name='app'):
+        self.pool = None
+        self.pool_name = pool_name
+        # Optional read-only copy of the database for prepared, streamed and read-only SELECTs
+        self.replica = None
+        self._pool_lock = threading.Lock()
+        # get_connection() raises at once when the pool is exhausted, so checkouts queue here first
+        self._pool_slots = threading.BoundedSemaphore(POOL_SIZE)
         self.config = {
-            'host': os.getenv('DB_HOST', 'localhost'),
+            'host': host or os.getenv('DB_HOST', 'localhost'),
             'database': os.getenv('DB_NAME', 'movie_review_system'),
             'user': os.getenv('DB_USER', 'root'),
             'password': os.getenv('DB_PASSWORD', ''),
             'port': int(os.getenv('DB_PORT', 3306)),
             'charset': 'utf8mb4',
             'collation': 'utf8mb4_unicode_ci',
-            'autocommit': True
+            'autocommit': True,
+            # Decode packets and rows in the C extension; DB_USE_PURE=1 falls back for comparison
+            'use_pure': os.getenv('DB_USE_PURE', '0').lower() in ('1', 'true', 'yes')
         }
     
     def connect(self):
-        """Establish database connection"""
+        """Create the database connection pool"""
         try:
-            # Check if .env file exists
-            if not os.path.exists('.env'):
-                logger.error("❌ .env file not found! Please create it with your database configuration.")
-                logger.error("Run: python create_env.py")
-                return False
-            
-            self.connection = mysql.connector.connect(**self.config)
-            if self.connection.is_connected():
-                logger.info("Successfully connected to MySQL database")
-                return True
+            with self._pool_lock:
+                if self.pool is None:
+                    # Resetting the session on release would drop the cached prepared statements
+                    self.pool = pooling.MySQLConnectionPool(
+                        pool_name=self.pool_name, pool_size=POOL_SIZE,
+                        pool_reset_session=False, **self.config
+                    )
+                    logger.info("Successfully connected to MySQL database")
+            return True
         except Error as e:
             logger.error(f"Error connecting to MySQL: {e}")
             if "Access denied" in str(e) and "using password: NO" in str(e):
                 logger.error("❌ Password not loaded from .env file!")
-                logger.error("Please check your .env file and run: python create_env.py")
+                logger.error("Please check DB_PASSWORD in your .env file")
             return False
     
     def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            logger.info("MySQL connection closed")
-    
-    def get_cursor(self):
-        """Get database cursor"""
-        if not self.connection or not self.connection.is_connected():
-            self.connect()
-        return self.connection.cursor(dictionary=True)
-    
-    def execute_query(self, query, params=None):
-        """Execute a query and return results"""
-        cursor = self.get_cursor()
+        """Close the idle pooled connections"""
+        with self._pool_lock:
+            if self.pool is not None:
+                self.pool._remove_connections()
+                self.pool = None
+                logger.info("MySQL connection closed")
+        if self.replica is not None:
+            self.replica.disconnect()
+    
+    def _checkout(self):
+        """Take a connection from the pool, waiting up to POOL_TIMEOUT for a free slot"""
+        if self.pool is None and not self.connect():
+            raise Error("Database connection is not available")
+        if not self._pool_slots.acquire(timeout=POOL_TIMEOUT):
+            logger.error(f"No pooled connection freed up within {POOL_TIMEOUT}s")
+            raise ServiceUnavailable("The database is busy. Please try again shortly.", retry_after=5)
         try:
-            cursor.execute(query, params)
-            query_upper = query.strip().upper()
-            if (query_upper.startswith('SELECT') or 
-                query_upper.startswith('SHOW') or 
-                query_upper.startswith('DESCRIBE') or
-                query_upper.startswith('EXPLAIN')):
-                return cursor.fetchall()
-            else:
-                self.connection.commit()
-                return cursor.rowcount
-        except Error as e:
-            logger.error(f"Database error: {e}")
-            self.connection.rollback()
-            raise e
+            # The pool pings the connection and reconnects it if it went stale
+            return self.pool.get_connection()
+        except Exception:
+            self._pool_slots.release()
+            raise
+    
+    def _release(self, conn):
+        """Give a connection back to the pool"""
+        try:
+            conn.close()
         finally:
-            cursor.close()
+            self._pool_slots.release()
     
-    def execute_procedure(self, procedure_name, params=None):
-        """Execute a stored procedure"""
-        cursor = self.get_cursor()
+    @contextmanager
+    def lease(self, shared=True):
+        """Borrow a pooled connection for the duration of a block"""
+        # Within a request every query shares one connection until teardown
+        if shared and has_app_context():
+            key = f'db_conn_{self.pool_name}'
+            conn = g.get(key)
+            if conn is None:
+                conn = self._checkout()
+                setattr(g, key, conn)
+            yield conn
+            return
+        # Hand back the request's shared connection first, so a request never sits on one slot while waiting for another
+        if has_app_context():
+            self.release_request_connection()
+        conn = self._checkout()
         try:
-            if params:
-                cursor.callproc(procedure_name, params)
-            else:
-                cursor.callproc(procedure_name)
-            
-            # Get results from all result sets
-            results = []
-            for result in cursor.stored_results():
-                results.extend(result.fetchall())
-            
-            self.connection.commit()
-            return results
+            yield conn
+        finally:
+            self._release(conn)
+    
+    def release_request_connection(self, rollback=False):
+        """Return the current request's connection to the pool"""
+        if self.replica is not None:
+            self.replica.release_request_connection(rollback)
+        conn = g.pop(f'db_conn_{self.pool_name}', None)
+        if conn is None:
+            return
+        try:
+            if rollback:
+                conn.rollback()
         except Error as e:
-            logger.error(f"Procedure error: {e}")
-            self.connection.rollback()
-            raise e
+            logger.error(f"Rollback failed: {e}")
         finally:
-            cursor.close()
+            self._release(conn)
+    
+    def _reader(self, force_primary=False):
+        """Pick where a SELECT runs: the replica, unless asked for the primary or this session wrote recently"""
+        if self.replica is None or force_primary:
+            return self
+        if has_app_context() and g.get('db_wrote'):
+            return self
+        # The redirect after a write lands on a new request, which must still see that write
+        if has_request_context() and time.time() - session.get('db_wrote_at', 0) < READ_AFTER_WRITE_WINDOW:
+            return self
+        return self.replica
+    
+    def _mark_write(self):
+        """Keep this request, and the session's next few seconds of requests, reading from the primary"""
+        if has_app_context():
+            g.db_wrote = True
+        if self.replica is not None and has_request_context():
+            session['db_wrote_at'] = time.time()
+    
+    def _prepared_cursor(self, conn, query, dictionary=True):
+        """Get the prepared-statement cursor cached on a pooled connection for a query"""
+        raw = conn._cnx
+        statements = getattr(raw, 'app_statements', None)
+        if statements is None or statements[0] != raw.connection_id:
+            # A reconnect drops every server-side statement
+            statements = (raw.connection_id, {})
+            raw.app_statements = statements
+        cache = statements[1]
+        key = (query, dictionary)
+        if key not in cache:
+            cache[key] = (query, raw.cursor(dictionary=dictionary, prepared=True))
+        return cache[key]
+    
+    def execute_query(self, query, params=None, prepared=False, readonly=False, force_primary=False):
+        """Execute a query and return results"""
+        if prepared:
+            return self._execute_prepared(query, params, force_primary)
+        if readonly and not force_primary:
+            reader = self._reader()
+            if reader is not self:
+                return reader.execute_query(query, params)
+        with self.lease() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params)
+                # The driver already knows from the result header whether rows came back
+                if cursor.with_rows:
+                    return cursor.fetchall()
+                else:
+                    conn.commit()
+                    self._mark_write()
+                    return cursor.rowcount
+            except Error as e:
+                logger.error(f"Database error: {e}")
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+    
+    def stream_query(self, query, params=None, size=500, prepared=False, named_tuples=False, force_primary=False):
+        """Yield the rows of a SELECT in chunks instead of loading them all at once"""
+        # Named tuples skip building a dict per row; templates read them the same way
+        dictionary = not named_tuples
+        # Unread rows would block the request connection, so stream on a dedicated one
+        with self._reader(force_primary).lease(shared=False) as conn:
+            if prepared:
+                statement, cursor = self._prepared_cursor(conn, query, dictionary)
+            else:
+                statement, cursor = query, conn.cursor(dictionary=dictionary)
+            try:
+                cursor.execute(statement, params)
+                make_row = _row_class(tuple(cursor.column_names))._make if named_tuples else None
+                while True:
+                    rows = cursor.fetchmany(size)
+                    if not rows:
+                        break
+                    if make_row:
+                        yield from map(make_row, rows)
+                    else:
+                        yield from rows
+            except Error as e:
+                logger.error(f"Database error: {e}")
+                if prepared:
+                    conn._cnx.app_statements[1].pop((query, dictionary), None)
+                raise e
+            finally:
+                # Drain anything left unread so the connection can go back to the pool
+                if prepared:
+                    try:
+                        cursor.fetchall()
+                    except Error:
+                        # Nothing was executed; the failed statement is already dropped above
+                        pass
+                else:
+                    conn.consume_results()
+                    cursor.close()
+    
+    def execute_insert(self, query, params=None):
+        """Execute an INSERT and return the generated row ID"""
+        with self.lease() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(query, params)
+                conn.commit()
+                self._mark_write()
+                return cursor.lastrowid
+            except Error as e:
+                logger.error(f"Database error: {e}")
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
+    
+    def _execute_prepared(self, query, params=None, force_primary=False):
+        """Execute a SELECT through a server-side prepared statement reused across calls"""
+        with self._reader(force_primary).lease() as conn:
+            statement, cursor = self._prepared_cursor(conn, query)
+            try:
+                # Passing the cached string object lets the cursor skip re-preparing
+                cursor.execute(statement, params)
+                return cursor.fetchall()
+            except Error as e:
+                logger.error(f"Database error: {e}")
+                conn._cnx.app_statements[1].pop((query, True), None)
+                raise e
+    
+    def execute_multi(self, query, params=None):
+        """Execute several statements in one round-trip and return each result set"""
+        with self.lease() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                results = []
+                for result in cursor.execute(query, params, multi=True):
+                    results.append(result.fetchall() if result.with_rows else [])
+                return results
+            except Error as e:
+                logger.error(f"Database error: {e}")
+                raise e
+            finally:
+                cursor.close()
+    
+    def execute_procedure(self, procedure_name, params=None):
+        """Execute a stored procedure"""
+        with self.lease() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                if params:
+                    cursor.callproc(procedure_name, params)
+                else:
+                    cursor.callproc(procedure_name)
+                
+                # Get results from all result sets
+                results = []
+                for result in cursor.stored_results():
+                    results.extend(result.fetchall())
+                
+                conn.commit()
+                self._mark_write()
+                return results
+            except Error as e:
+                logger.error(f"Procedure error: {e}")
+                conn.rollback()
+                raise e
+            finally:
+                cursor.close()
 
 # Global database instance
 db = DatabaseConnection()
+if os.getenv('DB_READ_HOST'):
+    db.replica = DatabaseConnection(host=os.getenv('DB_READ_HOST'), pool_name='replica')
 
 class User:
     """User model"""
@@ -122,7 +338,7 @@ class User:
                    verified_entity_type=None, verified_entity_id=None):
         """Create a new user using stored procedure"""
         try:
-            password_hash = generate_password_hash(password)
+            password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
             results = db.execute_procedure('sp_add_user', [
                 name, age, role, email, password_hash, gender, 
                 verified_entity_type, verified_entity_id
@@ -135,17 +351,31 @@ class User:
     @staticmethod
     def get_user_by_email(email):
         """Get user by email"""
-        query = "SELECT * FROM User WHERE Email = %s"
-        results = db.execute_query(query, (email,))
+        query = "SELECT * FROM User WHERE Email = %s LIMIT 1"
+        # Login and the duplicate-email check must see accounts registered moments ago
+        results = db.execute_query(query, (email,), prepared=True, force_primary=True)
         return results[0] if results else None
     
     @staticmethod
     def get_user_by_id(user_id):
         """Get user by ID"""
-        query = "SELECT * FROM User WHERE User_ID = %s"
-        results = db.execute_query(query, (user_id,))
+        query = "SELECT * FROM User WHERE User_ID = %s LIMIT 1"
+        results = db.execute_query(query, (user_id,), prepared=True, force_primary=True)
         return results[0] if results else None
     
+    @staticmethod
+    def search_users(search_query, exclude_user_id, limit=20):
+        """Search users by name or email, excluding the given user"""
+        query = """
+        SELECT User_ID, Name, Email
+        FROM User
+        WHERE User_ID != %s AND (Name LIKE %s OR Email LIKE %s)
+        ORDER BY Name
+        LIMIT %s
+        """
+        like = f"%{search_query}%"
+        return db.execute_query(query, (exclude_user_id, like, like, limit), prepared=True)
+    
     @staticmethod
     def verify_password(user, password):
         """Verify user password"""
@@ -156,115 +386,204 @@ class User:
         """Get user statistics"""
         query = """
         SELECT 
-            (SELECT COUNT(*) FROM Reviews WHERE User_ID = %s) as review_count,
-            (SELECT COUNT(*) FROM Friends WHERE User_ID1 = %s OR User_ID2 = %s) as friend_count,
-            (SELECT ROUND(AVG(Score), 2) FROM Reviews WHERE User_ID = %s) as avg_score
+            rs.review_count,
+            (SELECT COUNT(*) FROM Friends WHERE User_ID1 = %s) +
+            (SELECT COUNT(*) FROM Friends WHERE User_ID2 = %s) as friend_count,
+            rs.avg_score
+        FROM (
+            SELECT COUNT(*) as review_count, ROUND(AVG(Score), 2) as avg_score
+            FROM Reviews WHERE User_ID = %s
+        ) rs
         """
-        results = db.execute_query(query, (user_id, user_id, user_id, user_id))
+        results = db.execute_query(query, (user_id, user_id, user_id), prepared=True)
         return results[0] if results else None
 
+# InnoDB skips words shorter than innodb_ft_min_token_size and its default stopwords
+FULLTEXT_MIN_WORD = 3
+FULLTEXT_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from', 'how',
+    'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what',
+    'when', 'where', 'who', 'will', 'with', 'und', 'www',
+))
+
+def _filter_statements(select, genre_clause, title_column, tail=''):
+    """Build one statement per (genre, title search mode) filter combination"""
+    search_clauses = {
+        None: None,
+        'fulltext': f"MATCH({title_column}) AGAINST (%s IN BOOLEAN MODE)",
+        'prefix': f"{title_column} LIKE %s",
+    }
+    statements = {}
+    for by_genre in (False, True):
+        for mode, search_clause in search_clauses.items():
+            clauses = [clause for clause in (genre_clause if by_genre else None, search_clause) if clause]
+            where = f"WHERE {' AND '.join(clauses)}\n" if clauses else ''
+            statements[(by_genre, mode)] = f"{select}{where}{tail}"
+    return statements
+
+def _title_search(search_query):
+    """Turn a title search into a FULLTEXT word-prefix query, or a prefix LIKE when no word is indexable"""
+    words = [word for word in re.findall(r'\w+', search_query.lower())
+             if len(word) >= FULLTEXT_MIN_WORD and word not in FULLTEXT_STOPWORDS]
+    if words:
+        return 'fulltext', ' '.join(f'+{word}*' for word in words)
+    escaped = re.sub(r'([\\%_])', r'\\\1', search_query)
+    return 'prefix', f"{escaped}%"
+
+def _filter_shape(genre_id=None, search_query=None):
+    """Pick the statement for the optional genre and title filters and bind only those used"""
+    params = []
+    mode = None
+    if genre_id:
+        params.append(genre_id)
+    if search_query:
+        mode, term = _title_search(search_query)
+        params.append(term)
+    return (bool(genre_id), mode), params
+
 class Movie:
     """Movie model"""
     
-    @staticmethod
-    def get_all_movies():
-        """Get all movies with basic info"""
-        query = """
-        SELECT m.*, 
-               COUNT(r.Review_ID) as review_count,
-               ROUND(AVG(r.Score), 2) as avg_rating
+    # Fixed statements per filter shape, each prepared and planned on its own
+    # Card columns only; the 101-character description is enough for the "..." cut-off
+    _LIST_SELECT = """
+        SELECT m.Movie_ID, m.Title, LEFT(m.Description, 101) as Description, m.Year,
+               m.Length, m.Age_Rating, m.Created_At,
+               COALESCE(st.Total_Reviews, 0) as review_count,
+               st.Average_Rating as avg_rating
         FROM Movie m
-        LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-        GROUP BY m.Movie_ID
-        ORDER BY m.Title
+        LEFT JOIN Movie_Rating_Stats st ON m.Movie_ID = st.Movie_ID
         """
-        return db.execute_query(query)
+    _GENRE_FILTER = "EXISTS (SELECT 1 FROM Movie_Genre mg WHERE mg.Movie_ID = m.Movie_ID AND mg.Genre_ID = %s)"
+    _FILTERED_SQL = _filter_statements(_LIST_SELECT, _GENRE_FILTER, "m.Title", "ORDER BY m.Title")
+    _FILTERED_PAGE_SQL = _filter_statements(_LIST_SELECT, _GENRE_FILTER, "m.Title",
+                                            "ORDER BY m.Title\nLIMIT %s OFFSET %s")
+    _COUNTED_PAGE_SQL = _filter_statements(
+        _LIST_SELECT.replace("SELECT", "SELECT COUNT(*) OVER () as total_rows,", 1),
+        _GENRE_FILTER, "m.Title", "ORDER BY m.Title\nLIMIT %s OFFSET %s")
+    _FILTERED_COUNT_SQL = _filter_statements("SELECT COUNT(*) as count FROM Movie m\n",
+                                             _GENRE_FILTER, "m.Title")
+    # One statement per piece of the detail page, shared by the single getters and the bundles
+    _DETAIL_SQL = """
+        SELECT m.*,
+               COALESCE(st.Total_Reviews, 0) as review_count,
+               st.Average_Rating as avg_rating,
+               st.Total_Reviews * 0.7 + st.Average_Rating * 0.3 as popularity_score
+        FROM Movie m
+        LEFT JOIN Movie_Rating_Stats st ON m.Movie_ID = st.Movie_ID
+        WHERE m.Movie_ID = %s
+        """
+    _GENRES_SQL = """
+        SELECT g.* FROM Genre g
+        JOIN Movie_Genre mg ON g.Genre_ID = mg.Genre_ID
+        WHERE mg.Movie_ID = %s
+        """
+    _CELEBRITIES_SQL = """
+        SELECT c.*, mc.Role FROM Celebrity c
+        JOIN Movie_Celebrity mc ON c.Celebrity_ID = mc.Celebrity_ID
+        WHERE mc.Movie_ID = %s
+        """
+    _PRODUCTIONS_SQL = """
+        SELECT pc.*, mp.Role
+        FROM Production_Company pc
+        JOIN Movie_Production mp ON pc.Company_ID = mp.Company_ID
+        WHERE mp.Movie_ID = %s
+        """
+    _REVIEWS_SQL = """
+        SELECT r.*, u.Name as user_name
+        FROM Reviews r
+        JOIN User u ON r.User_ID = u.User_ID
+        WHERE r.Movie_ID = %s
+        ORDER BY r.Created_At DESC
+        """
+    _DETAIL_BUNDLE_SQL = ";".join((_DETAIL_SQL, _GENRES_SQL, _CELEBRITIES_SQL, _PRODUCTIONS_SQL, _REVIEWS_SQL))
+    _EDIT_BUNDLE_SQL = ";".join((_DETAIL_SQL, _GENRES_SQL, _CELEBRITIES_SQL, _PRODUCTIONS_SQL))
+    
+    @staticmethod
+    def get_all_movies(limit=None, offset=0, stream=False):
+        """Get all movies with their stored rating stats, optionally one page at a time"""
+        return Movie.get_movies_filtered(limit=limit, offset=offset, stream=stream)
 
     @staticmethod
-    def get_movies_filtered(genre_id=None, search_query=None):
+    def get_movies_filtered(genre_id=None, search_query=None, limit=None, offset=0, stream=False):
         """Get movies filtered by optional genre and/or title search"""
-        base = [
-            "SELECT m.*,",
-            "       COUNT(r.Review_ID) as review_count,",
-            "       ROUND(AVG(r.Score), 2) as avg_rating",
-            "FROM Movie m",
-            "LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID"
-        ]
-
-        params = []
-        where_clauses = []
+        shape, params = _filter_shape(genre_id, search_query)
+        if limit is None:
+            query = Movie._FILTERED_SQL[shape]
+        else:
+            query = Movie._FILTERED_PAGE_SQL[shape]
+            params.extend([limit, offset])
 
-        if genre_id:
-            base.append("JOIN Movie_Genre mg ON m.Movie_ID = mg.Movie_ID")
-            where_clauses.append("mg.Genre_ID = %s")
-            params.append(genre_id)
+        if stream:
+            return db.stream_query(query, tuple(params), prepared=True, named_tuples=True)
+        return db.execute_query(query, tuple(params), prepared=True)
 
-        if search_query:
-            where_clauses.append("m.Title LIKE %s")
-            params.append(f"%{search_query}%")
-
-        query = "\n".join(base)
-        if where_clauses:
-            query += "\nWHERE " + " AND ".join(where_clauses)
-        query += "\nGROUP BY m.Movie_ID\nORDER BY m.Title"
+    @staticmethod
+    def get_movies_page(genre_id=None, search_query=None, limit=50, offset=0):
+        """Get one page of filtered movies, each row carrying the total match count as total_rows"""
+        shape, params = _filter_shape(genre_id, search_query)
+        params.extend([limit, offset])
+        return db.execute_query(Movie._COUNTED_PAGE_SQL[shape], tuple(params), prepared=True)
 
-        return db.execute_query(query, tuple(params) if params else None)
+    @staticmethod
+    def count_movies_filtered(genre_id=None, search_query=None):
+        """Count movies matching the optional genre and/or title search"""
+        shape, params = _filter_shape(genre_id, search_query)
+        return db.execute_query(Movie._FILTERED_COUNT_SQL[shape], tuple(params), prepared=True)[0]['count']
     
     @staticmethod
+    @cached_content('movie')
     def get_movie_by_id(movie_id):
         """Get movie by ID with detailed info"""
-        query = """
-        SELECT m.*, 
-               COUNT(r.Review_ID) as review_count,
-               ROUND(AVG(r.Score), 2) as avg_rating,
-               (COUNT(r.Review_ID) * 0.7 + AVG(r.Score) * 0.3) as popularity_score
-        FROM Movie m
-        LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-        WHERE m.Movie_ID = %s
-        GROUP BY m.Movie_ID
-        """
-        results = db.execute_query(query, (movie_id,))
+        results = db.execute_query(Movie._DETAIL_SQL, (movie_id,), prepared=True, force_primary=True)
         return results[0] if results else None
     
     @staticmethod
+    def get_detail_bundle(movie_id):
+        """Get a movie with its genres, celebrities, production companies and reviews in one round-trip"""
+        movie, genres, celebrities, productions, reviews = db.execute_multi(Movie._DETAIL_BUNDLE_SQL, (movie_id,) * 5)
+        return (movie[0] if movie else None), genres, celebrities, productions, reviews
+    
+    @staticmethod
+    def get_edit_bundle(movie_id):
+        """Get a movie with its genres, celebrities and production companies in one round-trip"""
+        movie, genres, celebrities, productions = db.execute_multi(Movie._EDIT_BUNDLE_SQL, (movie_id,) * 4)
+        return (movie[0] if movie else None), genres, celebrities, productions
+    
+    @staticmethod
+    @cached_movie_relation('genres')
     def get_movie_genres(movie_id):
         """Get genres for a movie"""
-        query = """
-        SELECT g.* FROM Genre g
-        JOIN Movie_Genre mg ON g.Genre_ID = mg.Genre_ID
-        WHERE mg.Movie_ID = %s
-        """
-        return db.execute_query(query, (movie_id,))
+        return db.execute_query(Movie._GENRES_SQL, (movie_id,))
     
     @staticmethod
+    @cached_movie_relation('celebrities')
     def get_movie_celebrities(movie_id):
         """Get celebrities for a movie"""
-        query = """
-        SELECT c.*, mc.Role FROM Celebrity c
-        JOIN Movie_Celebrity mc ON c.Celebrity_ID = mc.Celebrity_ID
-        WHERE mc.Movie_ID = %s
-        """
-        return db.execute_query(query, (movie_id,))
+        return db.execute_query(Movie._CELEBRITIES_SQL, (movie_id,))
     
     @staticmethod
+    @cached_movie_relation('productions')
     def get_movie_production_companies(movie_id):
         """Get production companies for a movie"""
-        query = """
-        SELECT pc.*, mp.Role
-        FROM Production_Company pc
-        JOIN Movie_Production mp ON pc.Company_ID = mp.Company_ID
-        WHERE mp.Movie_ID = %s
-        """
-        return db.execute_query(query, (movie_id,))
+        return db.execute_query(Movie._PRODUCTIONS_SQL, (movie_id,))
+    
+    @staticmethod
+    def _genre_json(genre_ids):
+        """Encode distinct numeric genre IDs as the JSON array the procedures read with JSON_TABLE"""
+        if not genre_ids:
+            return None
+        return orjson.dumps(list(dict.fromkeys(map(int, genre_ids)))).decode()
     
     @staticmethod
     def create_movie_with_details(title, description, year, length, age_rating, genre_ids=None, celebrity_data=None, production_data=None):
         """Create a new movie with genres, celebrities, and production companies"""
+        # celebrity_data and production_data are lists of {'id', 'role'} credits
         try:
-            # Convert lists to comma-separated strings
-            genre_str = ','.join(map(str, genre_ids)) if genre_ids else None
-            celebrity_str = celebrity_data if celebrity_data else None
-            production_str = production_data if production_data else None
+            # Send the related IDs as JSON arrays
+            genre_str = Movie._genre_json(genre_ids)
+            celebrity_str = orjson.dumps(celebrity_data).decode() if celebrity_data else None
+            production_str = orjson.dumps(production_data).decode() if production_data else None
             
             results = db.execute_procedure('sp_create_movie_with_details', [
                 title, description, year, length, age_rating,
@@ -279,15 +598,17 @@ class Movie:
     def update_movie_with_details(movie_id, title, description, year, length, age_rating, genre_ids=None, celebrity_data=None, production_data=None):
         """Update a movie with genres, celebrities, and production companies"""
         try:
-            # Convert lists to comma-separated strings
-            genre_str = ','.join(map(str, genre_ids)) if genre_ids else None
-            celebrity_str = celebrity_data if celebrity_data else None
-            production_str = production_data if production_data else None
+            # Send the related IDs as JSON arrays
+            genre_str = Movie._genre_json(genre_ids)
+            celebrity_str = orjson.dumps(celebrity_data).decode() if celebrity_data else None
+            production_str = orjson.dumps(production_data).decode() if production_data else None
             
             results = db.execute_procedure('sp_update_movie_with_details', [
                 movie_id, title, description, year, length, age_rating,
                 genre_str, celebrity_str, production_str
             ])
+            clear_movie_relations(movie_id)
+            clear_content('movie', movie_id)
             return True
         except Error as e:
             logger.error(f"Error updating movie with details: {e}")
@@ -296,14 +617,7 @@ class Movie:
     @staticmethod
     def get_movie_reviews(movie_id):
         """Get reviews for a movie"""
-        query = """
-        SELECT r.*, u.Name as user_name
-        FROM Reviews r
-        JOIN User u ON r.User_ID = u.User_ID
-        WHERE r.Movie_ID = %s
-        ORDER BY r.Created_At DESC
-        """
-        return db.execute_query(query, (movie_id,))
+        return db.execute_query(Movie._REVIEWS_SQL, (movie_id,))
     
     @staticmethod
     def create_movie(title, description=None, year=None, length=None, age_rating=None):
@@ -313,10 +627,7 @@ class Movie:
             INSERT INTO Movie (Title, Description, Year, Length, Age_Rating)
             VALUES (%s, %s, %s, %s, %s)
             """
-            cursor = db.get_cursor()
-            cursor.execute(query, (title, description, year, length, age_rating))
-            db.connection.commit()
-            return cursor.lastrowid
+            return db.execute_insert(query, (title, description, year, length, age_rating))
         except Error as e:
             logger.error(f"Error creating movie: {e}")
             raise e
@@ -332,6 +643,7 @@ class Movie:
             WHERE Movie_ID = %s
             """
             result = db.execute_query(query, (title, description, year, length, age_rating, movie_id))
+            clear_content('movie', movie_id)
             return result is not None
         except Error as e:
             logger.error(f"Error updating movie: {e}")
@@ -343,6 +655,8 @@ class Movie:
         try:
             query = "DELETE FROM Movie WHERE Movie_ID = %s"
             result = db.execute_query(query, (movie_id,))
+            clear_movie_relations(movie_id)
+            clear_content('movie', movie_id)
             return result is not None
         except Error as e:
             logger.error(f"Error deleting movie: {e}")
@@ -351,86 +665,100 @@ class Movie:
 class TVShow:
     """TV Show model"""
     
-    @staticmethod
-    def get_all_shows():
-        """Get all shows with basic info"""
-        query = """
-        SELECT s.*, 
-               COUNT(r.Review_ID) as review_count,
-               ROUND(AVG(r.Score), 2) as avg_rating
+    # Fixed statements per filter shape, each prepared and planned on its own
+    _LIST_SELECT = """
+        SELECT s.Show_ID, s.Title, LEFT(s.Description, 101) as Description, s.Year,
+               s.Seasons, s.Episodes, s.Age_Rating, s.Created_At,
+               COALESCE(st.Total_Reviews, 0) as review_count,
+               st.Average_Rating as avg_rating
         FROM TV_Show s
-        LEFT JOIN Reviews r ON s.Show_ID = r.Show_ID
-        GROUP BY s.Show_ID
-        ORDER BY s.Title
+        LEFT JOIN Show_Rating_Stats st ON s.Show_ID = st.Show_ID
         """
-        return db.execute_query(query)
+    _GENRE_FILTER = "EXISTS (SELECT 1 FROM Show_Genre sg WHERE sg.Show_ID = s.Show_ID AND sg.Genre_ID = %s)"
+    _FILTERED_SQL = _filter_statements(_LIST_SELECT, _GENRE_FILTER, "s.Title", "ORDER BY s.Title")
+    _FILTERED_PAGE_SQL = _filter_statements(_LIST_SELECT, _GENRE_FILTER, "s.Title",
+                                            "ORDER BY s.Title\nLIMIT %s OFFSET %s")
+    _COUNTED_PAGE_SQL = _filter_statements(
+        _LIST_SELECT.replace("SELECT", "SELECT COUNT(*) OVER () as total_rows,", 1),
+        _GENRE_FILTER, "s.Title", "ORDER BY s.Title\nLIMIT %s OFFSET %s")
+    _FILTERED_COUNT_SQL = _filter_statements("SELECT COUNT(*) as count FROM TV_Show s\n",
+                                             _GENRE_FILTER, "s.Title")
+    _DETAIL_SQL = """
+        SELECT s.*,
+               COALESCE(st.Total_Reviews, 0) as review_count,
+               st.Average_Rating as avg_rating
+        FROM TV_Show s
+        LEFT JOIN Show_Rating_Stats st ON s.Show_ID = st.Show_ID
+        WHERE s.Show_ID = %s
+        """
+    _GENRES_SQL = """
+        SELECT g.* FROM Genre g
+        JOIN Show_Genre sg ON g.Genre_ID = sg.Genre_ID
+        WHERE sg.Show_ID = %s
+        """
+    _REVIEWS_SQL = """
+        SELECT r.*, u.Name as user_name
+        FROM Reviews r
+        JOIN User u ON r.User_ID = u.User_ID
+        WHERE r.Show_ID = %s
+        ORDER BY r.Created_At DESC
+        """
+    _DETAIL_BUNDLE_SQL = ";".join((_DETAIL_SQL, _GENRES_SQL, _REVIEWS_SQL))
+    
+    @staticmethod
+    def get_all_shows(limit=None, offset=0, stream=False):
+        """Get all shows with their stored rating stats, optionally one page at a time"""
+        return TVShow.get_shows_filtered(limit=limit, offset=offset, stream=stream)
 
     @staticmethod
-    def get_shows_filtered(genre_id=None, search_query=None):
+    def get_shows_filtered(genre_id=None, search_query=None, limit=None, offset=0, stream=False):
         """Get TV shows filtered by optional genre and/or title search"""
-        base = [
-            "SELECT s.*,",
-            "       COUNT(r.Review_ID) as review_count,",
-            "       ROUND(AVG(r.Score), 2) as avg_rating",
-            "FROM TV_Show s",
-            "LEFT JOIN Reviews r ON s.Show_ID = r.Show_ID"
-        ]
-
-        params = []
-        where_clauses = []
+        shape, params = _filter_shape(genre_id, search_query)
+        if limit is None:
+            query = TVShow._FILTERED_SQL[shape]
+        else:
+            query = TVShow._FILTERED_PAGE_SQL[shape]
+            params.extend([limit, offset])
 
-        if genre_id:
-            base.append("JOIN Show_Genre sg ON s.Show_ID = sg.Show_ID")
-            where_clauses.append("sg.Genre_ID = %s")
-            params.append(genre_id)
+        if stream:
+            return db.stream_query(query, tuple(params), prepared=True, named_tuples=True)
+        return db.execute_query(query, tuple(params), prepared=True)
 
-        if search_query:
-            where_clauses.append("s.Title LIKE %s")
-            params.append(f"%{search_query}%")
-
-        query = "\n".join(base)
-        if where_clauses:
-            query += "\nWHERE " + " AND ".join(where_clauses)
-        query += "\nGROUP BY s.Show_ID\nORDER BY s.Title"
+    @staticmethod
+    def get_shows_page(genre_id=None, search_query=None, limit=50, offset=0):
+        """Get one page of filtered shows, each row carrying the total match count as total_rows"""
+        shape, params = _filter_shape(genre_id, search_query)
+        params.extend([limit, offset])
+        return db.execute_query(TVShow._COUNTED_PAGE_SQL[shape], tuple(params), prepared=True)
 
-        return db.execute_query(query, tuple(params) if params else None)
+    @staticmethod
+    def count_shows_filtered(genre_id=None, search_query=None):
+        """Count TV shows matching the optional genre and/or title search"""
+        shape, params = _filter_shape(genre_id, search_query)
+        return db.execute_query(TVShow._FILTERED_COUNT_SQL[shape], tuple(params), prepared=True)[0]['count']
     
     @staticmethod
+    @cached_content('show')
     def get_show_by_id(show_id):
         """Get show by ID with detailed info"""
-        query = """
-        SELECT s.*, 
-               COUNT(r.Review_ID) as review_count,
-               ROUND(AVG(r.Score), 2) as avg_rating
-        FROM TV_Show s
-        LEFT JOIN Reviews r ON s.Show_ID = r.Show_ID
-        WHERE s.Show_ID = %s
-        GROUP BY s.Show_ID
-        """
-        results = db.execute_query(query, (show_id,))
+        results = db.execute_query(TVShow._DETAIL_SQL, (show_id,), prepared=True, force_primary=True)
         return results[0] if results else None
     
+    @staticmethod
+    def get_detail_bundle(show_id):
+        """Get a show with its genres and reviews in one round-trip"""
+        show, genres, reviews = db.execute_multi(TVShow._DETAIL_BUNDLE_SQL, (show_id,) * 3)
+        return (show[0] if show else None), genres, reviews
+    
     @staticmethod
     def get_show_genres(show_id):
         """Get genres for a show"""
-        query = """
-        SELECT g.* FROM Genre g
-        JOIN Show_Genre sg ON g.Genre_ID = sg.Genre_ID
-        WHERE sg.Show_ID = %s
-        """
-        return db.execute_query(query, (show_id,))
+        return db.execute_query(TVShow._GENRES_SQL, (show_id,))
     
     @staticmethod
     def get_show_reviews(show_id):
         """Get reviews for a show"""
-        query = """
-        SELECT r.*, u.Name as user_name
-        FROM Reviews r
-        JOIN User u ON r.User_ID = u.User_ID
-        WHERE r.Show_ID = %s
-        ORDER BY r.Created_At DESC
-        """
-        return db.execute_query(query, (show_id,))
+        return db.execute_query(TVShow._REVIEWS_SQL, (show_id,))
     
     @staticmethod
     def create_show(title, description=None, year=None, seasons=None, episodes=None, age_rating=None):
@@ -440,10 +768,7 @@ class TVShow:
             INSERT INTO TV_Show (Title, Description, Year, Seasons, Episodes, Age_Rating)
             VALUES (%s, %s, %s, %s, %s, %s)
             """
-            cursor = db.get_cursor()
-            cursor.execute(query, (title, description, year, seasons, episodes, age_rating))
-            db.connection.commit()
-            return cursor.lastrowid
+            return db.execute_insert(query, (title, description, year, seasons, episodes, age_rating))
         except Error as e:
             logger.error(f"Error creating TV show: {e}")
             raise e
@@ -459,6 +784,7 @@ class TVShow:
             WHERE Show_ID = %s
             """
             result = db.execute_query(query, (title, description, year, seasons, episodes, age_rating, show_id))
+            clear_content('show', show_id)
             return result is not None
         except Error as e:
             logger.error(f"Error updating TV show: {e}")
@@ -470,6 +796,7 @@ class TVShow:
         try:
             query = "DELETE FROM TV_Show WHERE Show_ID = %s"
             result = db.execute_query(query, (show_id,))
+            clear_content('show', show_id)
             return result is not None
         except Error as e:
             logger.error(f"Error deleting TV show: {e}")
@@ -485,16 +812,25 @@ class Review:
             results = db.execute_procedure('sp_add_review', [
                 user_id, movie_id, show_id, score, title, content
             ])
+            clear_recent_reviews_cache()
+            # The reviewer no longer gets this title recommended
+            clear_friend_recommendations(user_id)
+            # The reviewed title's count and average changed
+            if movie_id:
+                clear_content('movie', movie_id)
+            if show_id:
+                clear_content('show', show_id)
             return True
         except Error as e:
             logger.error(f"Error creating review: {e}")
             raise e
     
     @staticmethod
-    def get_user_reviews(user_id):
+    def get_user_reviews(user_id, stream=False):
         """Get all reviews by a user"""
         query = """
-        SELECT r.*, 
+        SELECT r.Review_ID, r.User_ID, r.Movie_ID, r.Show_ID, r.Score, r.Title,
+               LEFT(r.Content, 151) as Content, r.Created_At,
                m.Title as movie_title,
                s.Title as show_title
         FROM Reviews r
@@ -503,13 +839,18 @@ class Review:
         WHERE r.User_ID = %s
         ORDER BY r.Created_At DESC
         """
+        if stream:
+            return db.stream_query(query, (user_id,), named_tuples=True)
         return db.execute_query(query, (user_id,))
     
     @staticmethod
+    @cached_recent_reviews
     def get_recent_reviews(limit=10):
         """Get recent reviews"""
+        # Review lists show a 150-character excerpt, so the full text stays on the server
         query = """
-        SELECT r.*, 
+        SELECT r.Review_ID, r.User_ID, r.Movie_ID, r.Show_ID, r.Score, r.Title,
+               LEFT(r.Content, 151) as Content, r.Created_At,
                u.Name as user_name,
                m.Title as movie_title,
                s.Title as show_title
@@ -535,7 +876,7 @@ class Review:
             LEFT JOIN TV_Show s ON r.Show_ID = s.Show_ID
             WHERE r.Review_ID = %s
             """
-            results = db.execute_query(query, (review_id,))
+            results = db.execute_query(query, (review_id,), prepared=True)
             return results[0] if results else None
         except Error as e:
             logger.error(f"Error getting review by ID: {e}")
@@ -551,6 +892,9 @@ class Review:
             WHERE Review_ID = %s
             """
             db.execute_query(query, (score, title, content, review_id))
+            clear_recent_reviews_cache()
+            clear_content_cache()
+            clear_friend_recommendations()
             return True
         except Error as e:
             logger.error(f"Error updating review: {e}")
@@ -562,6 +906,9 @@ class Review:
         try:
             query = "DELETE FROM Reviews WHERE Review_ID = %s"
             db.execute_query(query, (review_id,))
+            clear_recent_reviews_cache()
+            clear_content_cache()
+            clear_friend_recommendations()
             return True
         except Error as e:
             logger.error(f"Error deleting review: {e}")
@@ -570,11 +917,28 @@ class Review:
 class Friendship:
     """Friendship model"""
     
+    # Friend list statements with and without the name/email search, prepared once each.
+    # Each direction of a friendship is its own index seek, merged with UNION ALL.
+    _FRIENDS_FILTERED_SQL = {
+        search: " UNION ALL ".join(
+            "SELECT u.User_ID, u.Name, u.Email, u.Age, u.Gender, u.Role, "
+            "       u.Created_At as user_created_at, u.Updated_At as user_updated_at, "
+            "       f.Created_At as friendship_date "
+            "FROM Friends f "
+            f"JOIN User u ON u.User_ID = f.{friend_column} "
+            f"WHERE f.{own_column} = %s "
+            + ("AND (u.Name LIKE %s OR u.Email LIKE %s) " if search else "")
+            for own_column, friend_column in (('User_ID1', 'User_ID2'), ('User_ID2', 'User_ID1'))
+        ) + " ORDER BY friendship_date DESC"
+        for search in (False, True)
+    }
+    
     @staticmethod
     def add_friendship(user1_id, user2_id):
         """Add friendship using stored procedure"""
         try:
             results = db.execute_procedure('sp_add_friendship', [user1_id, user2_id])
+            clear_friend_recommendations(user1_id, user2_id)
             return True
         except Error as e:
             logger.error(f"Error adding friendship: {e}")
@@ -590,6 +954,7 @@ class Friendship:
                OR (User_ID1 = %s AND User_ID2 = %s)
             """
             result = db.execute_query(query, (user1_id, user2_id, user2_id, user1_id))
+            clear_friend_recommendations(user1_id, user2_id)
             return result > 0
         except Error as e:
             logger.error(f"Error removing friendship: {e}")
@@ -599,17 +964,8 @@ class Friendship:
     def get_user_friends(user_id):
         """Get user friends"""
         try:
-            query = """
-            SELECT u.User_ID, u.Name, u.Email, u.Age, u.Gender, u.Role, 
-                   u.Created_At as user_created_at, u.Updated_At as user_updated_at,
-                   f.Created_At as friendship_date
-            FROM User u
-            JOIN Friends f ON (u.User_ID = f.User_ID2 AND f.User_ID1 = %s)
-                          OR (u.User_ID = f.User_ID1 AND f.User_ID2 = %s)
-            ORDER BY f.Created_At DESC
-            """
-            results = db.execute_query(query, (user_id, user_id))
-            return results
+            query = Friendship._FRIENDS_FILTERED_SQL[False]
+            return db.execute_query(query, (user_id, user_id), prepared=True)
         except Error as e:
             logger.error(f"Error getting friends: {e}")
             raise e
@@ -618,25 +974,13 @@ class Friendship:
     def get_user_friends_filtered(user_id, search_query=None):
         """Get user friends filtered by search on name or email"""
         try:
-            where_like = ""
             params = [user_id, user_id]
             if search_query:
-                where_like = " AND (u.Name LIKE %s OR u.Email LIKE %s)"
                 like = f"%{search_query}%"
-                params.extend([like, like])
+                params = [user_id, like, like, user_id, like, like]
 
-            query = (
-                "SELECT u.User_ID, u.Name, u.Email, u.Age, u.Gender, u.Role, "
-                "       u.Created_At as user_created_at, u.Updated_At as user_updated_at, "
-                "       f.Created_At as friendship_date "
-                "FROM User u "
-                "JOIN Friends f ON (u.User_ID = f.User_ID2 AND f.User_ID1 = %s) "
-                "              OR (u.User_ID = f.User_ID1 AND f.User_ID2 = %s) "
-                "WHERE 1=1" + where_like + " "
-                "ORDER BY f.Created_At DESC"
-            )
-
-            return db.execute_query(query, tuple(params))
+            query = Friendship._FRIENDS_FILTERED_SQL[bool(search_query)]
+            return db.execute_query(query, tuple(params), prepared=True)
         except Error as e:
             logger.error(f"Error getting filtered friends: {e}")
             raise e
@@ -660,39 +1004,44 @@ class Recommendation:
     def get_movie_recommendations(user_id, limit=10):
         """Get movie recommendations"""
         try:
+            # The user's genre scores are aggregated once per movie and their own
+            # reviews are excluded with an anti-join instead of per-row subqueries
             query = """
-            SELECT DISTINCT
+            SELECT
                 m.Movie_ID,
                 m.Title,
-                m.Description,
+                LEFT(m.Description, 101) as Description,
                 m.Year,
                 m.Length,
                 m.Age_Rating,
-                ROUND(AVG(r.Score), 2) as avg_rating,
-                COUNT(r.Review_ID) as review_count,
-                COALESCE(MAX(up.Preference_Score), 0) as max_preference_score
+                st.Average_Rating as avg_rating,
+                COALESCE(st.Total_Reviews, 0) as review_count,
+                COALESCE(pref.max_preference_score, 0) as max_preference_score
             FROM Movie m
-            LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-            LEFT JOIN User_Preferences up ON up.Genre_ID IN (
-                SELECT mg.Genre_ID FROM Movie_Genre mg WHERE mg.Movie_ID = m.Movie_ID
-            ) AND up.User_ID = %s
-            WHERE m.Movie_ID NOT IN (
-                SELECT Movie_ID FROM Reviews WHERE User_ID = %s AND Movie_ID IS NOT NULL
-            )
-            GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Length, m.Age_Rating
+            LEFT JOIN Movie_Rating_Stats st ON st.Movie_ID = m.Movie_ID
+            LEFT JOIN (
+                SELECT mg.Movie_ID, MAX(up.Preference_Score) as max_preference_score
+                FROM User_Preferences up
+                JOIN Movie_Genre mg ON mg.Genre_ID = up.Genre_ID
+                WHERE up.User_ID = %s
+                GROUP BY mg.Movie_ID
+            ) pref ON pref.Movie_ID = m.Movie_ID
+            LEFT JOIN Reviews ur ON ur.Movie_ID = m.Movie_ID AND ur.User_ID = %s
+            WHERE ur.Review_ID IS NULL
             ORDER BY 
                 max_preference_score DESC,
-                AVG(r.Score) DESC,
-                COUNT(r.Review_ID) DESC
+                avg_rating DESC,
+                review_count DESC
             LIMIT %s
             """
-            results = db.execute_query(query, (user_id, user_id, limit))
+            results = db.execute_query(query, (user_id, user_id, limit), prepared=True)
             return results
         except Error as e:
             logger.error(f"Error getting movie recommendations: {e}")
             raise e
     
     @staticmethod
+    @cached_friend_recommendations
     def get_friend_recommendations(user_id, limit=10):
         """Get friend recommendations based on friends' liked content (movies and shows)"""
         try:
@@ -701,7 +1050,7 @@ class Recommendation:
             SELECT DISTINCT
                 m.Movie_ID,
                 m.Title,
-                m.Description,
+                LEFT(m.Description, 101) as Description,
                 m.Year,
                 m.Length,
                 m.Age_Rating,
@@ -716,11 +1065,10 @@ class Recommendation:
             JOIN Reviews r ON m.Movie_ID = r.Movie_ID
             JOIN Friends f ON (f.User_ID1 = %s AND f.User_ID2 = r.User_ID) 
                           OR (f.User_ID2 = %s AND f.User_ID1 = r.User_ID)
-            WHERE m.Movie_ID NOT IN (
-                SELECT Movie_ID FROM Reviews WHERE User_ID = %s AND Movie_ID IS NOT NULL
-            )
+            LEFT JOIN Reviews ur ON ur.Movie_ID = m.Movie_ID AND ur.User_ID = %s
+            WHERE ur.Review_ID IS NULL
             AND r.Score >= 7.0
-            GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Length, m.Age_Rating
+            GROUP BY m.Movie_ID
             ORDER BY friend_likes DESC, avg_rating DESC
             LIMIT %s
             """
@@ -735,6 +1083,7 @@ class Genre:
     """Genre model"""
     
     @staticmethod
+    @cached_reference('genres')
     def get_all_genres():
         """Get all genres"""
         query = "SELECT * FROM Genre ORDER BY Name"
@@ -747,6 +1096,8 @@ class Genre:
             results = db.execute_procedure('sp_add_genre', [
                 name, description
             ])
+            # Dropdowns and the admin list script read these tables through the cache
+            clear_reference_cache()
             return results[0] if results else None
         except Error as e:
             logger.error(f"Error adding genre: {e}")
@@ -761,7 +1112,7 @@ class Genre:
         LEFT JOIN User_Preferences up ON g.Genre_ID = up.Genre_ID AND up.User_ID = %s
         ORDER BY up.Preference_Score DESC, g.Name
         """
-        return db.execute_query(query, (user_id,))
+        return db.execute_query(query, (user_id,), prepared=True)
     
     @staticmethod
     def populate_user_preferences():
@@ -777,6 +1128,7 @@ class ProductionCompany:
     """Production Company model"""
     
     @staticmethod
+    @cached_reference('companies')
     def get_all_companies():
         """Get all production companies"""
         query = "SELECT * FROM Production_Company ORDER BY Name"
@@ -796,6 +1148,7 @@ class ProductionCompany:
             results = db.execute_procedure('sp_add_production_company', [
                 name, founded_year, country, description
             ])
+            clear_reference_cache()
             return results[0] if results else None
         except Error as e:
             logger.error(f"Error adding production company: {e}")
@@ -805,6 +1158,7 @@ class Celebrity:
     """Celebrity model"""
     
     @staticmethod
+    @cached_reference('celebrities')
     def get_all_celebrities():
         """Get all celebrities"""
         query = "SELECT * FROM Celebrity ORDER BY Name"
@@ -824,55 +1178,120 @@ class Celebrity:
             results = db.execute_procedure('sp_add_celebrity', [
                 name, birth_year, nationality, bio
             ])
+            clear_reference_cache()
             return results[0] if results else None
         except Error as e:
             logger.error(f"Error adding celebrity: {e}")
             raise e
 
+# Rating stats reported for content that has no reviews
+EMPTY_RATING_STATS = {
+    'total_reviews': 0,
+    'average_rating': None,
+    'min_rating': None,
+    'max_rating': None,
+    'rating_stddev': None,
+}
+
 # Utility functions for views and analytics
+@lru_cache(maxsize=None)
+def _view_exists(name):
+    """Check (once per process) whether a view is defined in the connected schema"""
+    query = "SELECT 1 FROM information_schema.VIEWS WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+    exists = bool(db.execute_query(query, (name,)))
+    if not exists:
+        logger.warning(f"View {name} is missing; falling back to direct queries. Re-run the schema script to create it")
+    return exists
+
+def _rating_stats_getter(table, id_column, label):
+    """Build the stored rating-stats lookup for one content table"""
+    query = f"""
+    SELECT 
+        Total_Reviews as total_reviews,
+        Average_Rating as average_rating,
+        Min_Rating as min_rating,
+        Max_Rating as max_rating,
+        Rating_Stddev as rating_stddev
+    FROM {table}
+    WHERE {id_column} = %s
+    """
+    
+    def get_rating_stats(content_id):
+        try:
+            results = db.execute_query(query, (content_id,), prepared=True)
+            # Content without reviews has no stats row yet
+            return results[0] if results else dict(EMPTY_RATING_STATS)
+        except Error as e:
+            logger.error(f"Error getting {label} rating stats: {e}")
+            raise e
+    
+    get_rating_stats.__doc__ = f"Get {label} rating statistics"
+    return get_rating_stats
+
 class Analytics:
     """Analytics and view queries"""
     
     @staticmethod
-    def get_popular_movies():
-        """Get popular movies and shows - always use combined query"""
+    def _popular_after(content_type, id_column, after):
+        """Keep one popular-content branch to the rows that sort after a keyset cursor"""
+        if after is None:
+            return '', []
+        score, after_type, after_id = after
+        if after_type == content_type:
+            return f"AND (st.Score_Sum, st.{id_column}) < (%s, %s)", [score, after_id]
+        # Movies sort before shows with the same popularity
+        op = '<=' if content_type > after_type else '<'
+        return f"AND st.Score_Sum {op} %s", [score]
+    
+    @staticmethod
+    def get_popular_movies(limit=20, after=None):
+        """Get popular movies and shows from the stored rating stats"""
+        # after is the (popularity_score, content_type, Movie_ID) of the last row already shown
         try:
-            # Use combined query to include both movies and shows
-            query = """
-                SELECT 
+            movie_where, movie_params = Analytics._popular_after('movie', 'Movie_ID', after)
+            show_where, show_params = Analytics._popular_after('show', 'Show_ID', after)
+            # Popularity (count x average) is the stored score sum; each branch reads its top rows off that index.
+            # Stats rows left at zero once their last review is deleted stay out of the list
+            query = f"""
+                (SELECT 
                     m.Movie_ID,
                     m.Title,
-                    m.Description,
+                    LEFT(m.Description, 101) as Description,
                     m.Year,
                     m.Age_Rating,
-                    COUNT(r.Review_ID) as review_count,
-                    ROUND(AVG(r.Score), 2) as average_rating,
-                    (COUNT(r.Review_ID) * COALESCE(AVG(r.Score), 0)) as popularity_score,
+                    st.Total_Reviews as review_count,
+                    st.Average_Rating as average_rating,
+                    st.Score_Sum as popularity_score,
                     'movie' as content_type
-                FROM Movie m
-                LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-                GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Age_Rating
+                FROM Movie_Rating_Stats st
+                JOIN Movie m ON m.Movie_ID = st.Movie_ID
+                WHERE st.Score_Sum > 0 {movie_where}
+                ORDER BY st.Score_Sum DESC, st.Movie_ID DESC
+                LIMIT %s)
                 
                 UNION ALL
                 
-                SELECT 
+                (SELECT 
                     s.Show_ID as Movie_ID,
                     s.Title,
-                    s.Description,
+                    LEFT(s.Description, 101) as Description,
                     s.Year,
                     s.Age_Rating,
-                    COUNT(r.Review_ID) as review_count,
-                    ROUND(AVG(r.Score), 2) as average_rating,
-                    (COUNT(r.Review_ID) * COALESCE(AVG(r.Score), 0)) as popularity_score,
+                    st.Total_Reviews as review_count,
+                    st.Average_Rating as average_rating,
+                    st.Score_Sum as popularity_score,
                     'show' as content_type
-                FROM TV_Show s
-                LEFT JOIN Reviews r ON s.Show_ID = r.Show_ID
-                GROUP BY s.Show_ID, s.Title, s.Description, s.Year, s.Age_Rating
+                FROM Show_Rating_Stats st
+                JOIN TV_Show s ON s.Show_ID = st.Show_ID
+                WHERE st.Score_Sum > 0 {show_where}
+                ORDER BY st.Score_Sum DESC, st.Show_ID DESC
+                LIMIT %s)
                 
-                ORDER BY popularity_score DESC
-                LIMIT 20
+                ORDER BY popularity_score DESC, content_type, Movie_ID DESC
+                LIMIT %s
             """
-            return db.execute_query(query)
+            params = movie_params + [limit] + show_params + [limit, limit]
+            return db.execute_query(query, tuple(params), readonly=True)
         except Exception as e:
             logger.error(f"Error getting popular content: {e}")
             raise e
@@ -880,88 +1299,104 @@ class Analytics:
     @staticmethod
     def get_top_rated_movies():
         """Get top rated movies from view or fallback to direct query"""
-        try:
-            # Try view first
-            query = "SELECT * FROM vw_top_rated_movies LIMIT 20"
-            return db.execute_query(query)
-        except Exception as e:
-            logger.warning(f"View query failed, using fallback: {e}")
-            # Fallback to direct query
+        if _view_exists('vw_top_rated_movies'):
+            query = """
+            SELECT Movie_ID, Title, Year, Age_Rating, review_count, average_rating
+            FROM vw_top_rated_movies
+            LIMIT 20
+            """
+        else:
             query = """
                 SELECT 
                     m.Movie_ID,
                     m.Title,
-                    m.Description,
                     m.Year,
                     m.Age_Rating,
                     COUNT(r.Review_ID) as review_count,
                     ROUND(AVG(r.Score), 2) as average_rating
                 FROM Movie m
                 LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-                GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Age_Rating
+                GROUP BY m.Movie_ID, m.Title, m.Year, m.Age_Rating
                 HAVING review_count >= 1
                 ORDER BY average_rating DESC
                 LIMIT 20
             """
-            return db.execute_query(query)
+        return db.execute_query(query, readonly=True)
     
     @staticmethod
     def get_top_rated_shows():
         """Get top rated shows from view"""
-        query = "SELECT * FROM vw_top_rated_shows LIMIT 20"
-        return db.execute_query(query)
+        query = """
+        SELECT Show_ID, Title, Year, Age_Rating, review_count, average_rating
+        FROM vw_top_rated_shows
+        LIMIT 20
+        """
+        return db.execute_query(query, readonly=True)
+    
+    @staticmethod
+    def get_top_rated_bundle(limit=20):
+        """Get top rated movies and shows in one round-trip"""
+        query = """
+        (SELECT 'movie' as content_type, Movie_ID, NULL as Show_ID,
+                Title, Year, Age_Rating, review_count, average_rating
+         FROM vw_top_rated_movies
+         ORDER BY average_rating DESC
+         LIMIT %s)
+        UNION ALL
+        (SELECT 'show' as content_type, NULL as Movie_ID, Show_ID,
+                Title, Year, Age_Rating, review_count, average_rating
+         FROM vw_top_rated_shows
+         ORDER BY average_rating DESC
+         LIMIT %s)
+        ORDER BY content_type, average_rating DESC
+        """
+        rows = db.execute_query(query, (limit, limit), readonly=True)
+        top_movies = [row for row in rows if row['content_type'] == 'movie']
+        top_shows = [row for row in rows if row['content_type'] == 'show']
+        return top_movies, top_shows
     
     @staticmethod
     def get_active_users():
         """Get active users from view"""
         query = "SELECT * FROM vw_active_users LIMIT 20"
-        return db.execute_query(query)
+        return db.execute_query(query, readonly=True)
     
     @staticmethod
     def get_friendship_network():
         """Get friendship network from view"""
         query = "SELECT * FROM vw_friendship_network ORDER BY similarity_score DESC LIMIT 50"
-        return db.execute_query(query)
+        return db.execute_query(query, readonly=True)
     
-    @staticmethod
-    def get_movie_rating_stats(movie_id):
-        """Get movie rating statistics"""
-        try:
-            query = """
-            SELECT 
-                COUNT(*) as total_reviews,
-                ROUND(AVG(Score), 2) as average_rating,
-                MIN(Score) as min_rating,
-                MAX(Score) as max_rating,
-                ROUND(STDDEV(Score), 2) as rating_stddev
-            FROM Reviews 
-            WHERE Movie_ID = %s
-            """
-            results = db.execute_query(query, (movie_id,))
-            return results[0] if results else None
-        except Error as e:
-            logger.error(f"Error getting movie rating stats: {e}")
-            raise e
-    
-    @staticmethod
-    def get_show_rating_stats(show_id):
-        """Get show rating statistics"""
-        try:
-            query = """
-            SELECT 
-                COUNT(*) as total_reviews,
-                ROUND(AVG(Score), 2) as average_rating,
-                MIN(Score) as min_rating,
-                MAX(Score) as max_rating,
-                ROUND(STDDEV(Score), 2) as rating_stddev
-            FROM Reviews 
-            WHERE Show_ID = %s
-            """
-            results = db.execute_query(query, (show_id,))
-            return results[0] if results else None
-        except Error as e:
-            logger.error(f"Error getting show rating stats: {e}")
-            raise e
+    get_movie_rating_stats = staticmethod(_rating_stats_getter('Movie_Rating_Stats', 'Movie_ID', 'movie'))
+    get_show_rating_stats = staticmethod(_rating_stats_getter('Show_Rating_Stats', 'Show_ID', 'show'))
+
+def request_memo(key, loader):
+    """Load a value at most once per request and share it through flask.g"""
+    memo = g.setdefault('memo', {})
+    if key not in memo:
+        memo[key] = loader()
+    return memo[key]
+
+def current_user():
+    """Get the logged-in user, reusing the row loaded earlier in this request"""
+    return request_memo('current_user', lambda: User.get_user_by_id(session['user_id']))
+
+def store_session_access(user):
+    """Keep the user's role and verified entity in the session so access checks skip the DB"""
+    session['user_role'] = user['Role']
+    session['verified_entity_type'] = user['verified_entity_type']
+    session['verified_entity_id'] = user['verified_entity_id']
+
+def session_role():
+    """Get the logged-in user's role, loading it once for sessions created before it was stored"""
+    if 'user_id' not in session:
+        return None
+    if 'verified_entity_type' not in session:
+        user = current_user()
+        if not user:
+            return None
+        store_session_access(user)
+    return session['user_role']
 
 # Role-based access control decorators
 def login_required(f):
@@ -974,6 +1409,9 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+# Roles allowed through verified_user_required
+VERIFIED_ROLES = frozenset(('verified_user', 'admin'))
+
 def admin_required(f):
     """Require admin role"""
     @wraps(f)
@@ -982,8 +1420,7 @@ def admin_required(f):
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('login'))
         
-        user = User.get_user_by_id(session['user_id'])
-        if not user or user['Role'] != 'admin':
+        if session_role() != 'admin':
             flash('Admin access required.', 'error')
             return redirect(url_for('home'))
         
@@ -998,8 +1435,7 @@ def verified_user_required(f):
             flash('Please log in to access this page.', 'error')
             return redirect(url_for('login'))
         
-        user = User.get_user_by_id(session['user_id'])
-        if not user or user['Role'] not in ['verified_user', 'admin']:
+        if session_role() not in VERIFIED_ROLES:
             flash('Verified user access required.', 'error')
             return redirect(url_for('home'))
         
@@ -1011,19 +1447,28 @@ def can_edit_content(content_owner_type, content_owner_id):
     if 'user_id' not in session:
         return False
     
-    user = User.get_user_by_id(session['user_id'])
-    if not user:
-        return False
+    role = session_role()
     
     # Admin can edit everything
-    if user['Role'] == 'admin':
+    if role == 'admin':
         return True
     
     # Verified users can edit their own content
-    if user['Role'] == 'verified_user':
-        if content_owner_type == 'company' and user['verified_entity_type'] == 'company':
-            return user['verified_entity_id'] == content_owner_id
-        elif content_owner_type == 'celebrity' and user['verified_entity_type'] == 'celebrity':
-            return user['verified_entity_id'] == content_owner_id
+    if role == 'verified_user':
+        if content_owner_type == 'company' and session['verified_entity_type'] == 'company':
+            return session['verified_entity_id'] == content_owner_id
+        elif content_owner_type == 'celebrity' and session['verified_entity_type'] == 'celebrity':
+            return session['verified_entity_id'] == content_owner_id
     
     return False
+
+def can_edit_movie(celebrities, productions):
+    """Check if current user can edit a movie, given its credited celebrities and production companies"""
+    if 'user_id' not in session:
+        return False
+    if session_role() == 'admin':
+        return True
+    
+    # Verified users can edit movies that credit their celebrity or company
+    return (any(can_edit_content('celebrity', c['Celebrity_ID']) for c in celebrities) or
+            any(can_edit_content('company', pc['Company_ID']) for pc in productions))
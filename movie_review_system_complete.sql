@@ -18,14 +18,14 @@ CREATE TABLE User (
     Name VARCHAR(100) NOT NULL,
     Age INT CHECK (Age >= 13 AND Age <= 120),
     Role ENUM('admin', 'verified_user', 'normal_user') NOT NULL DEFAULT 'normal_user',
-    Email VARCHAR(255) UNIQUE NOT NULL,
+    Email VARCHAR(255) NOT NULL,
     PasswordHash VARCHAR(255) NOT NULL,
     Gender ENUM('M', 'F', 'Other'),
     verified_entity_type ENUM('company', 'celebrity') NULL,
     verified_entity_id INT NULL,
     Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-    INDEX idx_email (Email),
+    UNIQUE INDEX idx_email (Email),
     INDEX idx_role (Role),
     INDEX idx_created_at (Created_At)
 );
@@ -69,6 +69,7 @@ CREATE TABLE Movie (
     Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_title (Title),
+    FULLTEXT INDEX ft_title (Title),
     INDEX idx_year (Year),
     INDEX idx_created_at (Created_At)
 );
@@ -85,6 +86,7 @@ CREATE TABLE TV_Show (
     Created_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_title (Title),
+    FULLTEXT INDEX ft_title (Title),
     INDEX idx_year (Year),
     INDEX idx_created_at (Created_At)
 );
@@ -107,8 +109,10 @@ CREATE TABLE Reviews (
     UNIQUE KEY unique_user_show (User_ID, Show_ID),
     INDEX idx_score (Score),
     INDEX idx_created_at (Created_At),
-    INDEX idx_movie_id (Movie_ID),
-    INDEX idx_show_id (Show_ID)
+    -- Score rides along so the rating-stats refresh reads only the index
+    INDEX idx_movie_score (Movie_ID, Score),
+    INDEX idx_show_score (Show_ID, Score),
+    INDEX idx_user_created (User_ID, Created_At)
 );
 
 -- Friends table
@@ -121,8 +125,9 @@ CREATE TABLE Friends (
     FOREIGN KEY (User_ID2) REFERENCES User(User_ID) ON DELETE CASCADE,
     UNIQUE KEY unique_friendship (User_ID1, User_ID2),
     CHECK (User_ID1 != User_ID2),
-    INDEX idx_user1 (User_ID1),
-    INDEX idx_user2 (User_ID2),
+    -- Cover each direction of the friend list lookups
+    INDEX idx_user1 (User_ID1, User_ID2, Created_At),
+    INDEX idx_user2 (User_ID2, User_ID1, Created_At),
     INDEX idx_created_at (Created_At)
 );
 
@@ -175,17 +180,91 @@ CREATE TABLE Show_Celebrity (
     FOREIGN KEY (Celebrity_ID) REFERENCES Celebrity(Celebrity_ID) ON DELETE CASCADE
 );
 
--- User Preferences table
+-- User Preferences table: the user's average score per genre. The triggers only adjust
+-- the review count and score sum; the score is derived from them
 CREATE TABLE User_Preferences (
     User_ID INT NOT NULL,
     Genre_ID INT NOT NULL,
-    Preference_Score DECIMAL(5,2) NOT NULL DEFAULT 0.0,
+    Review_Count INT NOT NULL DEFAULT 0,
+    Score_Sum DECIMAL(10,1) NOT NULL DEFAULT 0,
+    Preference_Score DECIMAL(5,2) AS (ROUND(Score_Sum / NULLIF(Review_Count, 0), 2)) STORED,
     PRIMARY KEY (User_ID, Genre_ID),
     FOREIGN KEY (User_ID) REFERENCES User(User_ID) ON DELETE CASCADE,
     FOREIGN KEY (Genre_ID) REFERENCES Genre(Genre_ID) ON DELETE CASCADE,
     INDEX idx_preference_score (Preference_Score)
 );
 
+-- Movie rating statistics, kept current by the Reviews triggers. The triggers only
+-- adjust the count and running sums; the average and deviation are derived from them
+CREATE TABLE Movie_Rating_Stats (
+    Movie_ID INT PRIMARY KEY,
+    Total_Reviews INT NOT NULL DEFAULT 0,
+    Score_Sum DECIMAL(10,1) NOT NULL DEFAULT 0,
+    Score_Sum_Squares DECIMAL(14,2) NOT NULL DEFAULT 0,
+    Average_Rating DECIMAL(4,2) AS (ROUND(Score_Sum / NULLIF(Total_Reviews, 0), 2)) STORED,
+    Min_Rating DECIMAL(3,1),
+    Max_Rating DECIMAL(3,1),
+    -- Population standard deviation, as STDDEV() reports it
+    Rating_Stddev DECIMAL(4,2) AS (ROUND(SQRT(GREATEST(
+        Score_Sum_Squares / NULLIF(Total_Reviews, 0) - POW(Score_Sum / NULLIF(Total_Reviews, 0), 2), 0)), 2)) STORED,
+    Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (Movie_ID) REFERENCES Movie(Movie_ID) ON DELETE CASCADE,
+    -- Popularity is review count x average score, which is just the score sum
+    INDEX idx_score_sum (Score_Sum),
+    INDEX idx_average_rating (Average_Rating, Total_Reviews)
+);
+
+-- TV show rating statistics, kept current by the Reviews triggers
+CREATE TABLE Show_Rating_Stats (
+    Show_ID INT PRIMARY KEY,
+    Total_Reviews INT NOT NULL DEFAULT 0,
+    Score_Sum DECIMAL(10,1) NOT NULL DEFAULT 0,
+    Score_Sum_Squares DECIMAL(14,2) NOT NULL DEFAULT 0,
+    Average_Rating DECIMAL(4,2) AS (ROUND(Score_Sum / NULLIF(Total_Reviews, 0), 2)) STORED,
+    Min_Rating DECIMAL(3,1),
+    Max_Rating DECIMAL(3,1),
+    -- Population standard deviation, as STDDEV() reports it
+    Rating_Stddev DECIMAL(4,2) AS (ROUND(SQRT(GREATEST(
+        Score_Sum_Squares / NULLIF(Total_Reviews, 0) - POW(Score_Sum / NULLIF(Total_Reviews, 0), 2), 0)), 2)) STORED,
+    Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (Show_ID) REFERENCES TV_Show(Show_ID) ON DELETE CASCADE,
+    INDEX idx_score_sum (Score_Sum),
+    INDEX idx_average_rating (Average_Rating, Total_Reviews)
+);
+
+-- Review and friend counts per user, kept current by the User, Reviews and Friends triggers
+CREATE TABLE User_Activity (
+    User_ID INT PRIMARY KEY,
+    Review_Count INT NOT NULL DEFAULT 0,
+    Friend_Count INT NOT NULL DEFAULT 0,
+    Score_Sum DECIMAL(10,1) NOT NULL DEFAULT 0,
+    Average_Rating DECIMAL(4,2) AS (ROUND(Score_Sum / NULLIF(Review_Count, 0), 2)) STORED,
+    Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (User_ID) REFERENCES User(User_ID) ON DELETE CASCADE,
+    INDEX idx_activity (Review_Count, Friend_Count)
+);
+
+-- Similarity of each friendship, kept current by the Friends and Reviews triggers
+CREATE TABLE Friendship_Similarity (
+    User_ID1 INT NOT NULL,
+    User_ID2 INT NOT NULL,
+    Similarity_Score DECIMAL(5,2) NOT NULL DEFAULT 0.0,
+    Updated_At TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (User_ID1, User_ID2),
+    FOREIGN KEY (User_ID1, User_ID2) REFERENCES Friends(User_ID1, User_ID2) ON DELETE CASCADE,
+    INDEX idx_user2 (User_ID2),
+    INDEX idx_similarity_score (Similarity_Score)
+);
+
+-- Users whose friendship similarities are stale. The Reviews and Friends triggers only queue
+-- the user; ev_refresh_friend_similarity recomputes their friendships off the write path
+CREATE TABLE Friend_Similarity_Queue (
+    User_ID INT PRIMARY KEY,
+    Queued_At TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (User_ID) REFERENCES User(User_ID) ON DELETE CASCADE,
+    INDEX idx_queued_at (Queued_At)
+);
+
 -- =============================================
 -- STORED PROCEDURES
 -- =============================================
@@ -330,6 +409,162 @@ BEGIN
     COMMIT;
 END //
 
+-- Procedure to recompute the stored rating statistics of a movie and/or show from scratch
+CREATE PROCEDURE sp_refresh_rating_stats(IN p_movie_id INT, IN p_show_id INT)
+BEGIN
+    IF p_movie_id IS NOT NULL THEN
+        INSERT INTO Movie_Rating_Stats (Movie_ID, Total_Reviews, Score_Sum, Score_Sum_Squares, Min_Rating, Max_Rating)
+        SELECT p_movie_id, COUNT(*), COALESCE(SUM(Score), 0), COALESCE(SUM(Score * Score), 0), MIN(Score), MAX(Score)
+        FROM Reviews
+        WHERE Movie_ID = p_movie_id
+        ON DUPLICATE KEY UPDATE
+            Total_Reviews = VALUES(Total_Reviews),
+            Score_Sum = VALUES(Score_Sum),
+            Score_Sum_Squares = VALUES(Score_Sum_Squares),
+            Min_Rating = VALUES(Min_Rating),
+            Max_Rating = VALUES(Max_Rating);
+    END IF;
+    
+    IF p_show_id IS NOT NULL THEN
+        INSERT INTO Show_Rating_Stats (Show_ID, Total_Reviews, Score_Sum, Score_Sum_Squares, Min_Rating, Max_Rating)
+        SELECT p_show_id, COUNT(*), COALESCE(SUM(Score), 0), COALESCE(SUM(Score * Score), 0), MIN(Score), MAX(Score)
+        FROM Reviews
+        WHERE Show_ID = p_show_id
+        ON DUPLICATE KEY UPDATE
+            Total_Reviews = VALUES(Total_Reviews),
+            Score_Sum = VALUES(Score_Sum),
+            Score_Sum_Squares = VALUES(Score_Sum_Squares),
+            Min_Rating = VALUES(Min_Rating),
+            Max_Rating = VALUES(Max_Rating);
+    END IF;
+END //
+
+-- Procedure to add (p_count = 1) or remove (p_count = -1) one score from the stored rating statistics
+CREATE PROCEDURE sp_apply_rating_change(IN p_movie_id INT, IN p_show_id INT, IN p_count INT, IN p_score DECIMAL(3,1))
+BEGIN
+    -- MIN/MAX are single seeks on the (Movie_ID, Score) / (Show_ID, Score) indexes
+    IF p_movie_id IS NOT NULL THEN
+        INSERT INTO Movie_Rating_Stats (Movie_ID, Total_Reviews, Score_Sum, Score_Sum_Squares, Min_Rating, Max_Rating)
+        SELECT p_movie_id, p_count, p_count * p_score, p_count * p_score * p_score, MIN(Score), MAX(Score)
+        FROM Reviews
+        WHERE Movie_ID = p_movie_id
+        ON DUPLICATE KEY UPDATE
+            Total_Reviews = Total_Reviews + VALUES(Total_Reviews),
+            Score_Sum = Score_Sum + VALUES(Score_Sum),
+            Score_Sum_Squares = Score_Sum_Squares + VALUES(Score_Sum_Squares),
+            Min_Rating = VALUES(Min_Rating),
+            Max_Rating = VALUES(Max_Rating);
+    END IF;
+    
+    IF p_show_id IS NOT NULL THEN
+        INSERT INTO Show_Rating_Stats (Show_ID, Total_Reviews, Score_Sum, Score_Sum_Squares, Min_Rating, Max_Rating)
+        SELECT p_show_id, p_count, p_count * p_score, p_count * p_score * p_score, MIN(Score), MAX(Score)
+        FROM Reviews
+        WHERE Show_ID = p_show_id
+        ON DUPLICATE KEY UPDATE
+            Total_Reviews = Total_Reviews + VALUES(Total_Reviews),
+            Score_Sum = Score_Sum + VALUES(Score_Sum),
+            Score_Sum_Squares = Score_Sum_Squares + VALUES(Score_Sum_Squares),
+            Min_Rating = VALUES(Min_Rating),
+            Max_Rating = VALUES(Max_Rating);
+    END IF;
+END //
+
+-- Procedure to add or remove reviews (p_reviews) and friendships (p_friends) from a user's activity
+CREATE PROCEDURE sp_apply_user_activity(IN p_user_id INT, IN p_reviews INT, IN p_friends INT, IN p_score DECIMAL(3,1))
+BEGIN
+    INSERT INTO User_Activity (User_ID, Review_Count, Friend_Count, Score_Sum)
+    VALUES (p_user_id, p_reviews, p_friends, p_reviews * COALESCE(p_score, 0))
+    ON DUPLICATE KEY UPDATE
+        Review_Count = Review_Count + VALUES(Review_Count),
+        Friend_Count = Friend_Count + VALUES(Friend_Count),
+        Score_Sum = Score_Sum + VALUES(Score_Sum);
+END //
+
+-- Procedure to add (p_count = 1) or remove (p_count = -1) one review from the reviewer's genre preferences
+CREATE PROCEDURE sp_apply_preference_change(IN p_user_id INT, IN p_movie_id INT, IN p_show_id INT, IN p_count INT, IN p_score DECIMAL(3,1))
+BEGIN
+    IF p_movie_id IS NOT NULL THEN
+        INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+        SELECT p_user_id, mg.Genre_ID, p_count, p_count * p_score
+        FROM Movie_Genre mg
+        WHERE mg.Movie_ID = p_movie_id
+        ON DUPLICATE KEY UPDATE
+            Review_Count = Review_Count + VALUES(Review_Count),
+            Score_Sum = Score_Sum + VALUES(Score_Sum);
+    END IF;
+    
+    IF p_show_id IS NOT NULL THEN
+        INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+        SELECT p_user_id, sg.Genre_ID, p_count, p_count * p_score
+        FROM Show_Genre sg
+        WHERE sg.Show_ID = p_show_id
+        ON DUPLICATE KEY UPDATE
+            Review_Count = Review_Count + VALUES(Review_Count),
+            Score_Sum = Score_Sum + VALUES(Score_Sum);
+    END IF;
+    
+    IF p_count < 0 THEN
+        DELETE FROM User_Preferences WHERE User_ID = p_user_id AND Review_Count <= 0;
+    END IF;
+END //
+
+-- Procedure to add (p_count = 1) or remove (p_count = -1) a title's reviews from one of its genres,
+-- or from all of them when p_genre_id is NULL. A single genre comes from p_genre_id rather than
+-- the genre table, since the AFTER DELETE triggers call this once that row is already gone
+CREATE PROCEDURE sp_apply_genre_preference_change(IN p_movie_id INT, IN p_show_id INT, IN p_genre_id INT, IN p_count INT)
+BEGIN
+    IF p_movie_id IS NOT NULL THEN
+        INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+        SELECT r.User_ID, g.Genre_ID, p_count * COUNT(*), p_count * SUM(r.Score)
+        FROM Reviews r
+        JOIN (SELECT p_genre_id as Genre_ID FROM DUAL WHERE p_genre_id IS NOT NULL
+              UNION ALL
+              SELECT mg.Genre_ID FROM Movie_Genre mg WHERE mg.Movie_ID = p_movie_id AND p_genre_id IS NULL) g
+        WHERE r.Movie_ID = p_movie_id
+        GROUP BY r.User_ID, g.Genre_ID
+        ON DUPLICATE KEY UPDATE
+            Review_Count = Review_Count + VALUES(Review_Count),
+            Score_Sum = Score_Sum + VALUES(Score_Sum);
+    END IF;
+    
+    IF p_show_id IS NOT NULL THEN
+        INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+        SELECT r.User_ID, g.Genre_ID, p_count * COUNT(*), p_count * SUM(r.Score)
+        FROM Reviews r
+        JOIN (SELECT p_genre_id as Genre_ID FROM DUAL WHERE p_genre_id IS NOT NULL
+              UNION ALL
+              SELECT sg.Genre_ID FROM Show_Genre sg WHERE sg.Show_ID = p_show_id AND p_genre_id IS NULL) g
+        WHERE r.Show_ID = p_show_id
+        GROUP BY r.User_ID, g.Genre_ID
+        ON DUPLICATE KEY UPDATE
+            Review_Count = Review_Count + VALUES(Review_Count),
+            Score_Sum = Score_Sum + VALUES(Score_Sum);
+    END IF;
+    
+    IF p_count < 0 THEN
+        DELETE up FROM User_Preferences up
+        JOIN Reviews r ON r.User_ID = up.User_ID
+        WHERE (r.Movie_ID = p_movie_id OR r.Show_ID = p_show_id)
+        AND up.Review_Count <= 0;
+    END IF;
+END //
+
+-- Procedure to rebuild every user's activity counts from Reviews and Friends
+CREATE PROCEDURE sp_refresh_user_activity()
+BEGIN
+    DELETE FROM User_Activity;
+    
+    INSERT INTO User_Activity (User_ID, Review_Count, Friend_Count, Score_Sum)
+    SELECT 
+        u.User_ID,
+        (SELECT COUNT(*) FROM Reviews r WHERE r.User_ID = u.User_ID),
+        (SELECT COUNT(*) FROM Friends f WHERE f.User_ID1 = u.User_ID)
+            + (SELECT COUNT(*) FROM Friends f WHERE f.User_ID2 = u.User_ID),
+        (SELECT COALESCE(SUM(r.Score), 0) FROM Reviews r WHERE r.User_ID = u.User_ID)
+    FROM User u;
+END //
+
 -- Procedure to get movie recommendations
 CREATE PROCEDURE sp_get_movie_recommendations(IN p_user_id INT)
 BEGIN
@@ -372,7 +607,7 @@ BEGIN
     LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
     GROUP BY m.Movie_ID, m.Title, m.Year
     HAVING review_count > 0
-    ORDER BY (COUNT(r.Review_ID) * AVG(r.Score)) DESC
+    ORDER BY SUM(r.Score) DESC
     LIMIT p_limit;
 END //
 
@@ -546,34 +781,32 @@ BEGIN
     -- Clear existing genres
     DELETE FROM Movie_Genre WHERE Movie_ID = p_movie_id;
     
-    -- Add new genres (comma-separated IDs)
+    -- Add new genres (JSON array of genre IDs)
     IF p_genre_ids IS NOT NULL AND p_genre_ids != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Genre (Movie_ID, Genre_ID) SELECT ', p_movie_id, ', Genre_ID FROM Genre WHERE Genre_ID IN (', p_genre_ids, ')');
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Genre (Movie_ID, Genre_ID)
+        SELECT p_movie_id, g.Genre_ID
+        FROM JSON_TABLE(p_genre_ids, '$[*]' COLUMNS (id INT PATH '$')) jt
+        JOIN Genre g ON g.Genre_ID = jt.id;
     END IF;
     
     -- Clear existing celebrities
     DELETE FROM Movie_Celebrity WHERE Movie_ID = p_movie_id;
     
-    -- Add new celebrities (format: "celebrity_id:role,celebrity_id:role")
+    -- Add new celebrities (JSON array of {"id": celebrity_id, "role": role})
     IF p_celebrity_data IS NOT NULL AND p_celebrity_data != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Celebrity (Movie_ID, Celebrity_ID, Role) VALUES ', p_celebrity_data);
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Celebrity (Movie_ID, Celebrity_ID, Role)
+        SELECT p_movie_id, jt.id, jt.role
+        FROM JSON_TABLE(p_celebrity_data, '$[*]' COLUMNS (id INT PATH '$.id', role VARCHAR(100) PATH '$.role')) jt;
     END IF;
     
     -- Clear existing production companies
     DELETE FROM Movie_Production WHERE Movie_ID = p_movie_id;
     
-    -- Add new production companies (format: "company_id:role,company_id:role")
+    -- Add new production companies (JSON array of {"id": company_id, "role": role})
     IF p_production_data IS NOT NULL AND p_production_data != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Production (Movie_ID, Company_ID, Role) VALUES ', p_production_data);
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Production (Movie_ID, Company_ID, Role)
+        SELECT p_movie_id, jt.id, jt.role
+        FROM JSON_TABLE(p_production_data, '$[*]' COLUMNS (id INT PATH '$.id', role VARCHAR(100) PATH '$.role')) jt;
     END IF;
     
     COMMIT;
@@ -606,28 +839,26 @@ BEGIN
     
     SET v_movie_id = LAST_INSERT_ID();
     
-    -- Add genres
+    -- Add genres (JSON array of genre IDs)
     IF p_genre_ids IS NOT NULL AND p_genre_ids != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Genre (Movie_ID, Genre_ID) SELECT ', v_movie_id, ', Genre_ID FROM Genre WHERE Genre_ID IN (', p_genre_ids, ')');
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Genre (Movie_ID, Genre_ID)
+        SELECT v_movie_id, g.Genre_ID
+        FROM JSON_TABLE(p_genre_ids, '$[*]' COLUMNS (id INT PATH '$')) jt
+        JOIN Genre g ON g.Genre_ID = jt.id;
     END IF;
     
-    -- Add celebrities
+    -- Add celebrities (JSON array of {"id": celebrity_id, "role": role})
     IF p_celebrity_data IS NOT NULL AND p_celebrity_data != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Celebrity (Movie_ID, Celebrity_ID, Role) VALUES ', p_celebrity_data);
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Celebrity (Movie_ID, Celebrity_ID, Role)
+        SELECT v_movie_id, jt.id, jt.role
+        FROM JSON_TABLE(p_celebrity_data, '$[*]' COLUMNS (id INT PATH '$.id', role VARCHAR(100) PATH '$.role')) jt;
     END IF;
     
-    -- Add production companies
+    -- Add production companies (JSON array of {"id": company_id, "role": role})
     IF p_production_data IS NOT NULL AND p_production_data != '' THEN
-        SET @sql = CONCAT('INSERT INTO Movie_Production (Movie_ID, Company_ID, Role) VALUES ', p_production_data);
-        PREPARE stmt FROM @sql;
-        EXECUTE stmt;
-        DEALLOCATE PREPARE stmt;
+        INSERT INTO Movie_Production (Movie_ID, Company_ID, Role)
+        SELECT v_movie_id, jt.id, jt.role
+        FROM JSON_TABLE(p_production_data, '$[*]' COLUMNS (id INT PATH '$.id', role VARCHAR(100) PATH '$.role')) jt;
     END IF;
     
     SELECT v_movie_id as Movie_ID;
@@ -637,66 +868,21 @@ END //
 -- Procedure: Populate User Preferences
 CREATE PROCEDURE sp_populate_user_preferences()
 BEGIN
-    DECLARE done INT DEFAULT FALSE;
-    DECLARE v_user_id INT;
-    DECLARE v_movie_id INT;
-    DECLARE v_show_id INT;
-    DECLARE v_score DECIMAL(3,1);
-    DECLARE v_genre_id INT;
+    -- Rebuild every preference from the user's review count and score sum per genre
+    DELETE FROM User_Preferences;
     
-    -- Cursor for movie reviews
-    DECLARE movie_cursor CURSOR FOR
-        SELECT r.User_ID, r.Movie_ID, r.Score, mg.Genre_ID
+    INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+    SELECT t.User_ID, t.Genre_ID, COUNT(*), SUM(t.Score)
+    FROM (
+        SELECT r.User_ID, mg.Genre_ID, r.Score
         FROM Reviews r
         JOIN Movie_Genre mg ON r.Movie_ID = mg.Movie_ID
-        WHERE r.Movie_ID IS NOT NULL;
-    
-    -- Cursor for show reviews  
-    DECLARE show_cursor CURSOR FOR
-        SELECT r.User_ID, r.Show_ID, r.Score, sg.Genre_ID
+        UNION ALL
+        SELECT r.User_ID, sg.Genre_ID, r.Score
         FROM Reviews r
         JOIN Show_Genre sg ON r.Show_ID = sg.Show_ID
-        WHERE r.Show_ID IS NOT NULL;
-    
-    DECLARE CONTINUE HANDLER FOR NOT FOUND SET done = TRUE;
-    
-    -- Clear existing preferences
-    DELETE FROM User_Preferences;
-    
-    -- Process movie reviews
-    OPEN movie_cursor;
-    movie_loop: LOOP
-        FETCH movie_cursor INTO v_user_id, v_movie_id, v_score, v_genre_id;
-        IF done THEN
-            LEAVE movie_loop;
-        END IF;
-        
-        -- Insert or update preference
-        INSERT INTO User_Preferences (User_ID, Genre_ID, Preference_Score)
-        VALUES (v_user_id, v_genre_id, v_score)
-        ON DUPLICATE KEY UPDATE
-        Preference_Score = (Preference_Score + v_score) / 2;
-    END LOOP;
-    CLOSE movie_cursor;
-    
-    -- Reset done flag for show cursor
-    SET done = FALSE;
-    
-    -- Process show reviews
-    OPEN show_cursor;
-    show_loop: LOOP
-        FETCH show_cursor INTO v_user_id, v_show_id, v_score, v_genre_id;
-        IF done THEN
-            LEAVE show_loop;
-        END IF;
-        
-        -- Insert or update preference
-        INSERT INTO User_Preferences (User_ID, Genre_ID, Preference_Score)
-        VALUES (v_user_id, v_genre_id, v_score)
-        ON DUPLICATE KEY UPDATE
-        Preference_Score = (Preference_Score + v_score) / 2;
-    END LOOP;
-    CLOSE show_cursor;
+    ) t
+    GROUP BY t.User_ID, t.Genre_ID;
     
     -- Show summary
     SELECT 
@@ -707,6 +893,74 @@ BEGIN
     
 END //
 
+-- Procedure: Rebuild one user's preferences from scratch; the triggers keep them current
+-- incrementally, so this is only needed to repair drift
+CREATE PROCEDURE sp_refresh_user_preferences(IN p_user_id INT)
+BEGIN
+    DELETE FROM User_Preferences WHERE User_ID = p_user_id;
+    
+    INSERT INTO User_Preferences (User_ID, Genre_ID, Review_Count, Score_Sum)
+    SELECT t.User_ID, t.Genre_ID, COUNT(*), SUM(t.Score)
+    FROM (
+        SELECT r.User_ID, mg.Genre_ID, r.Score
+        FROM Reviews r
+        JOIN Movie_Genre mg ON r.Movie_ID = mg.Movie_ID
+        WHERE r.User_ID = p_user_id
+        UNION ALL
+        SELECT r.User_ID, sg.Genre_ID, r.Score
+        FROM Reviews r
+        JOIN Show_Genre sg ON r.Show_ID = sg.Show_ID
+        WHERE r.User_ID = p_user_id
+    ) t
+    GROUP BY t.User_ID, t.Genre_ID;
+END //
+
+-- Procedure: Mark a user's friendship similarities as stale
+CREATE PROCEDURE sp_queue_friend_similarity(IN p_user_id INT)
+BEGIN
+    INSERT INTO Friend_Similarity_Queue (User_ID) VALUES (p_user_id)
+    ON DUPLICATE KEY UPDATE Queued_At = CURRENT_TIMESTAMP(6);
+END //
+
+-- Procedure: Recompute the similarity of every friendship involving a queued user
+CREATE PROCEDURE sp_refresh_friend_similarity()
+BEGIN
+    DECLARE v_cutoff TIMESTAMP(6);
+    
+    -- Users queued again while this runs keep their entry for the next run
+    SELECT MAX(Queued_At) INTO v_cutoff FROM Friend_Similarity_Queue;
+    
+    INSERT INTO Friendship_Similarity (User_ID1, User_ID2, Similarity_Score)
+    SELECT f.User_ID1, f.User_ID2, fn_calculate_user_similarity(f.User_ID1, f.User_ID2)
+    FROM Friend_Similarity_Queue q
+    JOIN Friends f ON f.User_ID1 = q.User_ID
+    WHERE q.Queued_At <= v_cutoff
+    ON DUPLICATE KEY UPDATE Similarity_Score = VALUES(Similarity_Score);
+    
+    -- Pairs where both users are queued were covered by the first pass
+    INSERT INTO Friendship_Similarity (User_ID1, User_ID2, Similarity_Score)
+    SELECT f.User_ID1, f.User_ID2, fn_calculate_user_similarity(f.User_ID1, f.User_ID2)
+    FROM Friend_Similarity_Queue q
+    JOIN Friends f ON f.User_ID2 = q.User_ID
+    LEFT JOIN Friend_Similarity_Queue q1 ON q1.User_ID = f.User_ID1 AND q1.Queued_At <= v_cutoff
+    WHERE q.Queued_At <= v_cutoff
+    AND q1.User_ID IS NULL
+    ON DUPLICATE KEY UPDATE Similarity_Score = VALUES(Similarity_Score);
+    
+    DELETE FROM Friend_Similarity_Queue WHERE Queued_At <= v_cutoff;
+END //
+
+-- Procedure: Rebuild every friendship similarity from Reviews
+CREATE PROCEDURE sp_populate_friend_similarity()
+BEGIN
+    DELETE FROM Friend_Similarity_Queue;
+    DELETE FROM Friendship_Similarity;
+    
+    INSERT INTO Friendship_Similarity (User_ID1, User_ID2, Similarity_Score)
+    SELECT f.User_ID1, f.User_ID2, fn_calculate_user_similarity(f.User_ID1, f.User_ID2)
+    FROM Friends f;
+END //
+
 -- Procedure: Get User Preferences Summary
 CREATE PROCEDURE sp_get_user_preferences_summary(IN p_user_id INT)
 BEGIN
@@ -912,34 +1166,247 @@ BEGIN
     WHERE User_ID = NEW.User_ID;
 END //
 
--- Trigger to update user preferences after review (SIMPLIFIED VERSION)
+-- Triggers to keep User_Preferences in step with reviews and genre assignments
 CREATE TRIGGER tr_update_user_preferences
 AFTER INSERT ON Reviews
 FOR EACH ROW
 BEGIN
-    -- Update preferences for movie genres
-    IF NEW.Movie_ID IS NOT NULL THEN
-        INSERT INTO User_Preferences (User_ID, Genre_ID, Preference_Score)
-        SELECT NEW.User_ID, mg.Genre_ID, NEW.Score
-        FROM Movie_Genre mg
-        WHERE mg.Movie_ID = NEW.Movie_ID
-        ON DUPLICATE KEY UPDATE
-        Preference_Score = (Preference_Score + NEW.Score) / 2;
+    CALL sp_apply_preference_change(NEW.User_ID, NEW.Movie_ID, NEW.Show_ID, 1, NEW.Score);
+END //
+
+CREATE TRIGGER tr_user_preferences_after_update
+AFTER UPDATE ON Reviews
+FOR EACH ROW
+BEGIN
+    -- Edits to the title or text leave the preferences alone
+    IF NOT (OLD.User_ID <=> NEW.User_ID AND OLD.Movie_ID <=> NEW.Movie_ID
+            AND OLD.Show_ID <=> NEW.Show_ID AND OLD.Score <=> NEW.Score) THEN
+        CALL sp_apply_preference_change(OLD.User_ID, OLD.Movie_ID, OLD.Show_ID, -1, OLD.Score);
+        CALL sp_apply_preference_change(NEW.User_ID, NEW.Movie_ID, NEW.Show_ID, 1, NEW.Score);
     END IF;
-    
-    -- Update preferences for show genres
-    IF NEW.Show_ID IS NOT NULL THEN
-        INSERT INTO User_Preferences (User_ID, Genre_ID, Preference_Score)
-        SELECT NEW.User_ID, sg.Genre_ID, NEW.Score
-        FROM Show_Genre sg
-        WHERE sg.Show_ID = NEW.Show_ID
-        ON DUPLICATE KEY UPDATE
-        Preference_Score = (Preference_Score + NEW.Score) / 2;
+END //
+
+CREATE TRIGGER tr_user_preferences_after_delete
+AFTER DELETE ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_preference_change(OLD.User_ID, OLD.Movie_ID, OLD.Show_ID, -1, OLD.Score);
+END //
+
+CREATE TRIGGER tr_user_preferences_after_movie_genre_insert
+AFTER INSERT ON Movie_Genre
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(NEW.Movie_ID, NULL, NEW.Genre_ID, 1);
+END //
+
+CREATE TRIGGER tr_user_preferences_after_movie_genre_delete
+AFTER DELETE ON Movie_Genre
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(OLD.Movie_ID, NULL, OLD.Genre_ID, -1);
+END //
+
+CREATE TRIGGER tr_user_preferences_after_show_genre_insert
+AFTER INSERT ON Show_Genre
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(NULL, NEW.Show_ID, NEW.Genre_ID, 1);
+END //
+
+CREATE TRIGGER tr_user_preferences_after_show_genre_delete
+AFTER DELETE ON Show_Genre
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(NULL, OLD.Show_ID, OLD.Genre_ID, -1);
+END //
+
+-- Foreign key cascades do not fire triggers, so take a title's reviews out of the
+-- preferences before deleting it removes its Reviews and genre rows
+CREATE TRIGGER tr_user_preferences_before_movie_delete
+BEFORE DELETE ON Movie
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(OLD.Movie_ID, NULL, NULL, -1);
+END //
+
+CREATE TRIGGER tr_user_preferences_before_show_delete
+BEFORE DELETE ON TV_Show
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_genre_preference_change(NULL, OLD.Show_ID, NULL, -1);
+END //
+
+-- Triggers to keep Movie_Rating_Stats / Show_Rating_Stats in step with Reviews
+CREATE TRIGGER tr_rating_stats_after_insert
+AFTER INSERT ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_rating_change(NEW.Movie_ID, NEW.Show_ID, 1, NEW.Score);
+END //
+
+CREATE TRIGGER tr_rating_stats_after_update
+AFTER UPDATE ON Reviews
+FOR EACH ROW
+BEGIN
+    -- Edits to the title or text leave the statistics alone
+    IF NOT (OLD.Movie_ID <=> NEW.Movie_ID AND OLD.Show_ID <=> NEW.Show_ID AND OLD.Score <=> NEW.Score) THEN
+        CALL sp_apply_rating_change(OLD.Movie_ID, OLD.Show_ID, -1, OLD.Score);
+        CALL sp_apply_rating_change(NEW.Movie_ID, NEW.Show_ID, 1, NEW.Score);
+    END IF;
+END //
+
+CREATE TRIGGER tr_rating_stats_after_delete
+AFTER DELETE ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_rating_change(OLD.Movie_ID, OLD.Show_ID, -1, OLD.Score);
+END //
+
+-- Triggers to keep User_Activity in step with User, Reviews and Friends
+CREATE TRIGGER tr_user_activity_after_user_insert
+AFTER INSERT ON User
+FOR EACH ROW
+BEGIN
+    INSERT INTO User_Activity (User_ID) VALUES (NEW.User_ID);
+END //
+
+CREATE TRIGGER tr_user_activity_after_insert
+AFTER INSERT ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_user_activity(NEW.User_ID, 1, 0, NEW.Score);
+END //
+
+CREATE TRIGGER tr_user_activity_after_update
+AFTER UPDATE ON Reviews
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.User_ID <=> NEW.User_ID AND OLD.Score <=> NEW.Score) THEN
+        CALL sp_apply_user_activity(OLD.User_ID, -1, 0, OLD.Score);
+        CALL sp_apply_user_activity(NEW.User_ID, 1, 0, NEW.Score);
     END IF;
 END //
 
+CREATE TRIGGER tr_user_activity_after_delete
+AFTER DELETE ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_user_activity(OLD.User_ID, -1, 0, OLD.Score);
+END //
+
+CREATE TRIGGER tr_user_activity_after_friend_insert
+AFTER INSERT ON Friends
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_user_activity(NEW.User_ID1, 0, 1, NULL);
+    CALL sp_apply_user_activity(NEW.User_ID2, 0, 1, NULL);
+END //
+
+CREATE TRIGGER tr_user_activity_after_friend_delete
+AFTER DELETE ON Friends
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_user_activity(OLD.User_ID1, 0, -1, NULL);
+    CALL sp_apply_user_activity(OLD.User_ID2, 0, -1, NULL);
+END //
+
+-- Deleting a title cascades to its Reviews without firing tr_user_activity_after_delete,
+-- so take each reviewer's reviews of it out of their activity first
+CREATE TRIGGER tr_user_activity_before_movie_delete
+BEFORE DELETE ON Movie
+FOR EACH ROW
+BEGIN
+    UPDATE User_Activity a
+    JOIN (
+        SELECT User_ID, COUNT(*) as review_count, SUM(Score) as score_sum
+        FROM Reviews
+        WHERE Movie_ID = OLD.Movie_ID
+        GROUP BY User_ID
+    ) r ON a.User_ID = r.User_ID
+    SET a.Review_Count = a.Review_Count - r.review_count,
+        a.Score_Sum = a.Score_Sum - r.score_sum;
+END //
+
+CREATE TRIGGER tr_user_activity_before_show_delete
+BEFORE DELETE ON TV_Show
+FOR EACH ROW
+BEGIN
+    UPDATE User_Activity a
+    JOIN (
+        SELECT User_ID, COUNT(*) as review_count, SUM(Score) as score_sum
+        FROM Reviews
+        WHERE Show_ID = OLD.Show_ID
+        GROUP BY User_ID
+    ) r ON a.User_ID = r.User_ID
+    SET a.Review_Count = a.Review_Count - r.review_count,
+        a.Score_Sum = a.Score_Sum - r.score_sum;
+END //
+
+-- Triggers to queue Friendship_Similarity refreshes when Friends and Reviews change
+CREATE TRIGGER tr_friend_similarity_after_friend_insert
+AFTER INSERT ON Friends
+FOR EACH ROW
+BEGIN
+    -- The pair shows up straight away and gets its score on the next refresh
+    INSERT INTO Friendship_Similarity (User_ID1, User_ID2, Similarity_Score)
+    VALUES (NEW.User_ID1, NEW.User_ID2, 0);
+    CALL sp_queue_friend_similarity(NEW.User_ID1);
+END //
+
+CREATE TRIGGER tr_friend_similarity_after_insert
+AFTER INSERT ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_queue_friend_similarity(NEW.User_ID);
+END //
+
+CREATE TRIGGER tr_friend_similarity_after_update
+AFTER UPDATE ON Reviews
+FOR EACH ROW
+BEGIN
+    -- Only the reviewed title matters to similarity, not the score or text
+    IF NOT (OLD.User_ID <=> NEW.User_ID AND OLD.Movie_ID <=> NEW.Movie_ID AND OLD.Show_ID <=> NEW.Show_ID) THEN
+        CALL sp_queue_friend_similarity(NEW.User_ID);
+        IF OLD.User_ID <> NEW.User_ID THEN
+            CALL sp_queue_friend_similarity(OLD.User_ID);
+        END IF;
+    END IF;
+END //
+
+CREATE TRIGGER tr_friend_similarity_after_delete
+AFTER DELETE ON Reviews
+FOR EACH ROW
+BEGIN
+    CALL sp_queue_friend_similarity(OLD.User_ID);
+END //
+
+-- A deleted title's Reviews go by cascade without firing the trigger above, so queue its reviewers first
+CREATE TRIGGER tr_friend_similarity_before_movie_delete
+BEFORE DELETE ON Movie
+FOR EACH ROW
+BEGIN
+    INSERT INTO Friend_Similarity_Queue (User_ID)
+    SELECT DISTINCT User_ID FROM Reviews WHERE Movie_ID = OLD.Movie_ID
+    ON DUPLICATE KEY UPDATE Queued_At = CURRENT_TIMESTAMP(6);
+END //
+
+CREATE TRIGGER tr_friend_similarity_before_show_delete
+BEFORE DELETE ON TV_Show
+FOR EACH ROW
+BEGIN
+    INSERT INTO Friend_Similarity_Queue (User_ID)
+    SELECT DISTINCT User_ID FROM Reviews WHERE Show_ID = OLD.Show_ID
+    ON DUPLICATE KEY UPDATE Queued_At = CURRENT_TIMESTAMP(6);
+END //
+
 DELIMITER ;
 
+-- Recompute queued friendship similarities once a minute (needs event_scheduler=ON)
+CREATE EVENT ev_refresh_friend_similarity
+ON SCHEDULE EVERY 1 MINUTE
+DO CALL sp_refresh_friend_similarity();
+
 -- =============================================
 -- VIEWS
 -- =============================================
@@ -960,37 +1427,33 @@ LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
 GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Age_Rating
 ORDER BY popularity_score DESC;
 
--- View for top rated movies
+-- View for top rated movies (list columns only; the rankings never show descriptions)
 CREATE VIEW vw_top_rated_movies AS
 SELECT 
     m.Movie_ID,
     m.Title,
-    m.Description,
     m.Year,
     m.Age_Rating,
-    COUNT(r.Review_ID) as review_count,
-    ROUND(AVG(r.Score), 2) as average_rating
-FROM Movie m
-LEFT JOIN Reviews r ON m.Movie_ID = r.Movie_ID
-GROUP BY m.Movie_ID, m.Title, m.Description, m.Year, m.Age_Rating
-HAVING review_count >= 3
-ORDER BY average_rating DESC;
+    st.Total_Reviews as review_count,
+    st.Average_Rating as average_rating
+FROM Movie_Rating_Stats st
+JOIN Movie m ON st.Movie_ID = m.Movie_ID
+WHERE st.Total_Reviews >= 3
+ORDER BY st.Average_Rating DESC;
 
 -- View for top rated shows
 CREATE VIEW vw_top_rated_shows AS
 SELECT 
     s.Show_ID,
     s.Title,
-    s.Description,
     s.Year,
     s.Age_Rating,
-    COUNT(r.Review_ID) as review_count,
-    ROUND(AVG(r.Score), 2) as average_rating
-FROM TV_Show s
-LEFT JOIN Reviews r ON s.Show_ID = r.Show_ID
-GROUP BY s.Show_ID, s.Title, s.Description, s.Year, s.Age_Rating
-HAVING review_count >= 3
-ORDER BY average_rating DESC;
+    st.Total_Reviews as review_count,
+    st.Average_Rating as average_rating
+FROM Show_Rating_Stats st
+JOIN TV_Show s ON st.Show_ID = s.Show_ID
+WHERE st.Total_Reviews >= 3
+ORDER BY st.Average_Rating DESC;
 
 -- View for active users
 CREATE VIEW vw_active_users AS
@@ -999,27 +1462,26 @@ SELECT
     u.Name,
     u.Email,
     u.Role,
-    COUNT(DISTINCT r.Review_ID) as review_count,
-    COUNT(DISTINCT f.Friendship_ID) as friend_count,
-    ROUND(AVG(r.Score), 2) as avg_rating,
+    a.Review_Count as review_count,
+    a.Friend_Count as friend_count,
+    a.Average_Rating as avg_rating,
     u.Created_At
-FROM User u
-LEFT JOIN Reviews r ON u.User_ID = r.User_ID
-LEFT JOIN Friends f ON u.User_ID = f.User_ID1 OR u.User_ID = f.User_ID2
-GROUP BY u.User_ID, u.Name, u.Email, u.Role, u.Created_At
-ORDER BY review_count DESC, friend_count DESC;
+FROM User_Activity a
+JOIN User u ON a.User_ID = u.User_ID
+ORDER BY a.Review_Count DESC, a.Friend_Count DESC;
 
 -- View for friendship network
 CREATE VIEW vw_friendship_network AS
 SELECT 
     u1.Name as user_name,
     u2.Name as friend_name,
-    fn_calculate_user_similarity(u1.User_ID, u2.User_ID) as similarity_score,
+    fs.Similarity_Score as similarity_score,
     f.Created_At as friendship_date
-FROM Friends f
-JOIN User u1 ON f.User_ID1 = u1.User_ID
-JOIN User u2 ON f.User_ID2 = u2.User_ID
-ORDER BY similarity_score DESC;
+FROM Friendship_Similarity fs
+JOIN Friends f ON f.User_ID1 = fs.User_ID1 AND f.User_ID2 = fs.User_ID2
+JOIN User u1 ON fs.User_ID1 = u1.User_ID
+JOIN User u2 ON fs.User_ID2 = u2.User_ID
+ORDER BY fs.Similarity_Score DESC;
 
 -- =============================================
 -- SAMPLE DATA
@@ -1127,6 +1589,9 @@ INSERT INTO Reviews (User_ID, Score, Title, Content, Movie_ID, Show_ID) VALUES
 (5, 9.0, 'Hilarious comedy', 'Steve Carell is brilliant.', NULL, 2),
 (6, 9.5, 'Best TV show ever', 'Bryan Cranston is phenomenal.', NULL, 3);
 
+-- Score the sample friendships now rather than waiting for the event
+CALL sp_refresh_friend_similarity();
+
 -- =============================================
 -- ADDITIONAL INDEXES
 -- =============================================
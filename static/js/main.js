@@ -253,9 +253,66 @@ function updateStarDisplay(stars, rating) {
     });
 }
 
+// Keep a form's values across the redirect back from a failed POST.
+// Every form handler redirects to the form on failure, and the form puts its last submission back
+function keepFormDraft(form) {
+    const key = `draft:${window.location.pathname}${window.location.search}`;
+    const draft = sessionStorage.getItem(key);
+    sessionStorage.removeItem(key);
+    
+    // Only a redirect back from this form's own POST should restore the draft
+    if (draft && document.referrer === window.location.href) {
+        const values = JSON.parse(draft);
+        Array.from(form.elements).forEach(element => {
+            if (!element.name || element.type === 'password' || element.type === 'file') {
+                return;
+            }
+            if (element.type === 'checkbox' || element.type === 'radio') {
+                element.checked = (values[element.name] || []).includes(element.value);
+            } else if (element.name in values) {
+                element.value = values[element.name][0];
+            } else {
+                return;
+            }
+            element.dispatchEvent(new Event('change', { bubbles: true }));
+        });
+        form.dispatchEvent(new CustomEvent('draftrestore', { detail: values }));
+    }
+    
+    form.addEventListener('submit', function() {
+        const values = {};
+        new FormData(form).forEach((value, name) => {
+            const element = form.elements[name];
+            if (element && element.type === 'password') {
+                return;
+            }
+            (values[name] = values[name] || []).push(value);
+        });
+        sessionStorage.setItem(key, JSON.stringify(values));
+    });
+}
+
+// Re-check the celebrity or production company cards listed in a restored credits field
+function restoreCredits(kind, credits) {
+    const roles = new Map(credits.map(credit => [String(credit.id), credit.role]));
+    document.querySelectorAll(`.${kind}-checkbox`).forEach(checkbox => {
+        const roleSelect = checkbox.closest('.card').querySelector(`.${kind}-role`);
+        checkbox.checked = roles.has(checkbox.value);
+        roleSelect.style.display = checkbox.checked ? 'block' : 'none';
+        if (checkbox.checked) {
+            roleSelect.value = roles.get(checkbox.value);
+        }
+    });
+}
+
 // Initialize rating system when DOM is loaded
 document.addEventListener('DOMContentLoaded', initializeRatingSystem);
 
+// Forms marked data-keep-draft survive a failed submission
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('form[data-keep-draft]').forEach(keepFormDraft);
+});
+
 // Export functions for global use
 window.MovieReviewSystem = {
     formatDate,
@@ -265,5 +322,7 @@ window.MovieReviewSystem = {
     fetchAPI,
     confirmAction,
     setLoadingState,
-    submitFormWithLoading
+    submitFormWithLoading,
+    keepFormDraft,
+    restoreCredits
 };